@@ -2,11 +2,16 @@ from flask import Flask
 from flask_cors import CORS
 import os
 # from app.journals.routes import journal_bp  
+import click
+from sqlalchemy import event
 from app.config import Config
-from app.db import db, migrate, jwt, bcrypt
-from app.auth.routes import auth_bp
-from app.mood.routes import mood_bp
-from app.journals.routes import journals_bp
+from app.db import db, jwt, bcrypt
+from app.serializers import init_json
+from app.auth.cache import user_cache
+from app.mood.buffer import mood_buffer
+from app.auth.revocation import init_revocation
+from app.auth.hashing import init_hashing
+from app.instrumentation import init_instrumentation
 
 
 def create_app():
@@ -14,12 +19,21 @@ def create_app():
     # Allow routes without a trailing slash to be accepted without a redirect.
     app.url_map.strict_slashes = False
     app.config.from_object(Config)
+    init_json(app)
 
     # Initialize extensions
     db.init_app(app)
-    migrate.init_app(app, db)
     jwt.init_app(app)
     bcrypt.init_app(app)
+    init_hashing(app)
+    user_cache.init_app(app)
+    mood_buffer.init_app(app)
+    init_revocation(app)
+    init_instrumentation(app)
+    init_statement_timeout(app)
+
+    with app.app_context():
+        log_pool_config(app, db.engine)
 
     # Configure CORS
     # When requests from the frontend include credentials (cookies/auth headers)
@@ -45,37 +59,94 @@ def create_app():
             ]
         }, 200
 
-    # Register blueprints
+    register_blueprints(app)
+
+    # Migrations and dev tooling only matter to the `flask` CLI; web workers
+    # skip importing them (Flask-Migrate alone pulls in Alembic).
+    if not app.config['DEFER_IMPORTS'] or click.get_current_context(silent=True) is not None:
+        init_cli(app)
+
+    return app
+
+
+def register_blueprints(app):
+    from app.auth.routes import auth_bp
+    from app.mood.routes import mood_bp
+    from app.journals.routes import journals_bp
+    from app.community.routes import community_bp
+
     app.register_blueprint(auth_bp)
     app.register_blueprint(mood_bp)
     app.register_blueprint(journals_bp)
-    # Register community blueprint (routes define the blueprint)
-    try:
-        from app.community.routes import community_bp
-        app.register_blueprint(community_bp)
-    except Exception:
-        # If community routes aren't present or error on import, skip registration
-        pass
+    app.register_blueprint(community_bp)
 
 
-    # Import models for migrations
+def init_cli(app):
+    """Flask-Migrate (`flask db`), `flask bench` (see app/bench.py) and
+    `flask jobs` (see app/jobs/cli.py)."""
+    from flask_migrate import Migrate
+    from app.bench import bench
+    from app.jobs.cli import jobs
+    from app.journals.search import include_object
+
     register_models()
+    Migrate(app, db, include_object=include_object)
+    app.cli.add_command(bench)
+    app.cli.add_command(jobs)
 
-    # Add routes
-    # add_routes(app)
 
-    return app
+def log_pool_config(app, engine):
+    """Log the effective database pool settings once."""
+    pool = engine.pool
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    connect_args = options.get('connect_args', {})
+    app.logger.info(
+        'Database pool: %s size=%s max_overflow=%s timeout=%s recycle=%s '
+        'pre_ping=%s statement_timeout=%s pgbouncer=%s',
+        type(pool).__name__,
+        pool.size() if hasattr(pool, 'size') else None,
+        getattr(pool, '_max_overflow', None),
+        getattr(pool, '_timeout', None),
+        pool._recycle,
+        pool._pre_ping,
+        app.config['DB_STATEMENT_TIMEOUT_MS'],
+        'prepare_threshold' in connect_args,
+    )
+
+
+def init_statement_timeout(app):
+    """SET statement_timeout (DB_STATEMENT_TIMEOUT_MS) on every new Postgres
+    connection. A SET rather than the libpq `options` startup parameter,
+    which PgBouncer rejects."""
+    timeout = app.config['DB_STATEMENT_TIMEOUT_MS']
+    if not timeout or not (app.config['SQLALCHEMY_DATABASE_URI'] or '').startswith('postgres'):
+        return
+    if app.config['DB_PGBOUNCER']:
+        # Transaction pooling hands each transaction any server connection,
+        # so a session SET wouldn't reliably apply
+        app.logger.warning('DB_STATEMENT_TIMEOUT_MS is ignored with DB_PGBOUNCER; '
+                           'set statement_timeout on the database role instead')
+        return
+
+    def set_statement_timeout(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'SET statement_timeout = {int(timeout)}')
+        cursor.close()
+        # Commit so the pool's reset-on-return rollback doesn't undo it
+        dbapi_connection.commit()
+
+    # On this app's engine only, so another create_app doesn't stack a second listener
+    with app.app_context():
+        event.listen(db.engine, 'connect', set_statement_timeout)
 
 
 def register_models():
     #Import models for Flask-Migrate
-    try:
-        from app.auth import models as auth_models  
-        from app.community import models as community_models
-        from app.journals import models as journals_models  
-        from app.mood import models as mood_models  
-    except ImportError:
-        pass
+    from app.auth import models as auth_models
+    from app.community import models as community_models
+    from app.journals import models as journals_models
+    from app.mood import models as mood_models
+    from app.jobs import models as jobs_models
 
 
 # def add_routes(app):
@@ -0,0 +1,215 @@
+# app/auth/admin.py
+"""Batch admin actions over users and therapists, as set-based SQL.
+
+A batch targets explicit `ids` or a `filter`. It is processed in chunks of
+ADMIN_BATCH_CHUNK ids, walked in id order. Each chunk is one UPDATE (or one
+DELETE per dependent table) and its own transaction, so locks stay short.
+A batch that fails part-way keeps the chunks already committed, and the
+response says how far it got.
+
+These are Core-style bulk statements, so no mapper events fire. The user
+cache is invalidated here, and journal entries are dropped from the search
+index before they are deleted.
+"""
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app, jsonify
+
+from app.db import db
+from app.auth.models import User, Therapist
+from app.auth.cache import user_cache
+from app.community.models import (
+    Community, CommunityMembership, CommunityMessage,
+    DirectMessage, Connection, UnreadCounter, DMThread
+)
+from app.journals.models import Journal
+from app.journals.search import unindex_entries
+from app.mood.models import Mood, MoodDailyRollup
+from app.streaming import wants_ndjson, ndjson_events
+
+
+class InvalidBatch(ValueError):
+    pass
+
+
+def _date(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise InvalidBatch(f'Invalid date: {value!r}')
+
+
+def _bool(value):
+    if not isinstance(value, bool):
+        raise InvalidBatch(f'Expected true or false, got {value!r}')
+    return value
+
+
+# filter key -> criterion, per model
+USER_FILTERS = {
+    'role': lambda v: User.role == v,
+    'is_verified': lambda v: User.is_verified.is_(True) if _bool(v) else User.is_verified.isnot(True),
+    'created_before': lambda v: User.created_at < _date(v),
+    'created_after': lambda v: User.created_at >= _date(v),
+}
+THERAPIST_FILTERS = {
+    'verified': lambda v: Therapist.verified.is_(True) if _bool(v) else Therapist.verified.isnot(True),
+    'specialty': lambda v: Therapist.specialty == v,
+    'created_before': lambda v: Therapist.created_at < _date(v),
+    'created_after': lambda v: Therapist.created_at >= _date(v),
+}
+
+
+def batch_criteria(model, data, filters):
+    """WHERE criteria for the rows a batch request names, by `ids` or `filter`."""
+    ids, filter_ = data.get('ids'), data.get('filter')
+    if (ids is None) == (filter_ is None):
+        raise InvalidBatch('Provide either ids or filter')
+
+    if ids is not None:
+        max_ids = current_app.config['ADMIN_BATCH_MAX_IDS']
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise InvalidBatch('ids must be a list of integers')
+        if not ids or len(ids) > max_ids:
+            raise InvalidBatch(f'ids must hold 1 to {max_ids} ids; use filter for more')
+        return [model.id.in_(set(ids))]
+
+    # An empty filter would match every row; that is never what an admin means
+    if not isinstance(filter_, dict) or not filter_:
+        raise InvalidBatch(f'filter must be an object using any of: {", ".join(filters)}')
+    unknown = set(filter_) - set(filters)
+    if unknown:
+        raise InvalidBatch(f'Unknown filter keys: {", ".join(sorted(unknown))}')
+    return [filters[key](value) for key, value in filter_.items()]
+
+
+def _execute(statement):
+    return db.session.execute(statement, execution_options={'synchronize_session': False}).rowcount
+
+
+# Actions: each takes one chunk of ids, runs inside the chunk's transaction
+# and returns a Counter whose 'affected' is the number of target rows changed.
+
+def promote_users(ids):
+    return Counter(affected=_execute(
+        db.update(User).where(User.id.in_(ids), User.role != 'admin').values(role='admin')
+    ))
+
+
+def demote_users(ids):
+    return Counter(affected=_execute(
+        db.update(User).where(User.id.in_(ids), User.role == 'admin').values(role='user')
+    ))
+
+
+def delete_users(ids):
+    """Delete users and everything that references them, children first so
+    foreign keys hold at every step. Other users' denormalized DM counters
+    lose the unread messages the deleted users sent them."""
+    counts = Counter()
+    owned = db.select(Community.id).where(Community.owner_id.in_(ids)).scalar_subquery()
+    counts['community_memberships'] = _execute(db.delete(CommunityMembership).where(
+        CommunityMembership.user_id.in_(ids) | CommunityMembership.community_id.in_(owned)))
+    counts['community_messages'] = _execute(db.delete(CommunityMessage).where(
+        CommunityMessage.user_id.in_(ids) | CommunityMessage.community_id.in_(owned)))
+    counts['communities'] = _execute(db.delete(Community).where(Community.owner_id.in_(ids)))
+
+    unread_from_deleted = db.select(db.func.count()).where(
+        DirectMessage.recipient_id == UnreadCounter.user_id,
+        DirectMessage.sender_id.in_(ids),
+        DirectMessage.is_read == False
+    ).scalar_subquery()
+    _execute(
+        db.update(UnreadCounter)
+        .where(UnreadCounter.user_id.in_(
+            db.select(DirectMessage.recipient_id)
+            .where(DirectMessage.sender_id.in_(ids), DirectMessage.is_read == False)
+        ))
+        .values(unread_count=UnreadCounter.unread_count - unread_from_deleted)
+    )
+    _execute(db.delete(UnreadCounter).where(UnreadCounter.user_id.in_(ids)))
+    # Threads point at their last message, so they go before the messages
+    _execute(db.delete(DMThread).where(DMThread.user_low_id.in_(ids) | DMThread.user_high_id.in_(ids)))
+    counts['direct_messages'] = _execute(db.delete(DirectMessage).where(
+        DirectMessage.sender_id.in_(ids) | DirectMessage.recipient_id.in_(ids)))
+    counts['connections'] = _execute(db.delete(Connection).where(
+        Connection.requester_id.in_(ids) | Connection.addressee_id.in_(ids)))
+
+    unindex_entries(Journal.user_id.in_(ids))
+    counts['journals'] = _execute(db.delete(Journal).where(Journal.user_id.in_(ids)))
+    counts['moods'] = _execute(db.delete(Mood).where(Mood.user_id.in_(ids)))
+    _execute(db.delete(MoodDailyRollup).where(MoodDailyRollup.user_id.in_(ids)))
+    counts['therapists'] = _execute(db.delete(Therapist).where(Therapist.user_id.in_(ids)))
+
+    counts['affected'] = _execute(db.delete(User).where(User.id.in_(ids)))
+    return counts
+
+
+def verify_therapists(ids):
+    return Counter(affected=_execute(
+        db.update(Therapist).where(Therapist.id.in_(ids), Therapist.verified.isnot(True)).values(verified=True)
+    ))
+
+
+def delete_therapists(ids):
+    return Counter(affected=_execute(db.delete(Therapist).where(Therapist.id.in_(ids))))
+
+
+USER_ACTIONS = {'promote': promote_users, 'demote': demote_users, 'delete': delete_users}
+THERAPIST_ACTIONS = {'verify': verify_therapists, 'delete': delete_therapists}
+
+
+def run_batch(action, model, criteria, chunk_size, on_commit=None):
+    """Apply `action` to the rows matching `criteria`, one committed chunk at a
+    time. Yields running totals after each chunk. The last item has
+    'done': True, plus 'error' if a chunk failed and was rolled back."""
+    totals = Counter()
+    last_id = 0
+    while True:
+        ids = db.session.scalars(
+            db.select(model.id).where(*criteria, model.id > last_id).order_by(model.id).limit(chunk_size)
+        ).all()
+        if not ids:
+            break
+        try:
+            counts = action(ids)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.exception('Batch %s failed after %d rows', action.__name__, totals['processed'])
+            yield {'processed': 0, 'affected': 0, **totals, 'done': True, 'error': type(e).__name__}
+            return
+        if on_commit:
+            on_commit(ids)
+        totals.update(counts)
+        totals['processed'] += len(ids)
+        last_id = ids[-1]
+        yield dict(totals)
+    yield {'processed': 0, 'affected': 0, **totals, 'done': True}
+
+
+def batch_response(actions, model, data, filters, exclude_ids=()):
+    """Run the batch described by a request body ({action, ids | filter,
+    dry_run}). The body is a JSON summary, or NDJSON progress lines when the
+    client asks for application/x-ndjson."""
+    name = data.get('action')
+    if name not in actions:
+        raise InvalidBatch(f'action must be one of: {", ".join(actions)}')
+    criteria = batch_criteria(model, data, filters)
+    if exclude_ids:
+        criteria.append(model.id.not_in(exclude_ids))
+
+    if data.get('dry_run'):
+        matched = db.session.scalar(db.select(db.func.count()).select_from(model).where(*criteria))
+        return jsonify({'action': name, 'matched': matched, 'dry_run': True}), 200
+
+    on_commit = (lambda ids: user_cache.invalidate(*ids)) if model is User else None
+    progress = run_batch(actions[name], model, criteria,
+                         current_app.config['ADMIN_BATCH_CHUNK'], on_commit)
+
+    if wants_ndjson():
+        return ndjson_events({'action': name, **step} for step in progress)
+
+    *_, summary = progress
+    return jsonify({'action': name, **summary}), 500 if 'error' in summary else 200
@@ -0,0 +1,183 @@
+# app/auth/cache.py
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.db import db
+from app.auth.models import User
+
+
+class UserSnapshot:
+    """The public, rarely-changing fields of a user, cheap to keep in memory."""
+    __slots__ = ('id', 'username', 'role', 'is_verified', 'profile_image')
+
+    def __init__(self, id, username, role, is_verified, profile_image):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.is_verified = is_verified
+        self.profile_image = profile_image
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.role, user.is_verified, user.profile_image)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class LRUBackend:
+    """In-process LRU with a per-entry TTL. Private to each worker."""
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """Shares snapshots across workers through any client with redis-py's
+    get/set(ex=)/delete API (a local Redis, or a stand-in for tests)."""
+
+    def __init__(self, client, ttl=300, prefix='user:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(f'{self.prefix}{key}')
+        return UserSnapshot(**json.loads(raw)) if raw else None
+
+    def set(self, key, value):
+        self.client.set(f'{self.prefix}{key}', json.dumps(value.to_dict()), ex=self.ttl)
+
+    def delete(self, key):
+        self.client.delete(f'{self.prefix}{key}')
+
+    def clear(self):
+        pass
+
+
+class UserCache:
+    """Read-through cache of UserSnapshot by user id.
+
+    Entries are dropped once a transaction that updated or deleted a User
+    through the ORM commits. Dropping them at flush time would let a
+    concurrent request re-cache the old row before the commit lands. Code
+    that changes users with bulk UPDATE/DELETE statements must call
+    `invalidate` itself after committing.
+
+    USER_CACHE_BACKEND picks the backend: 'memory' (per-process LRU) or
+    'redis' (shared, at USER_CACHE_REDIS_URL; needs the `redis` package). A
+    backend passed to the constructor is kept as is.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or LRUBackend()
+        self._configured = backend is not None
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        if self._configured:
+            return
+        kind = app.config.get('USER_CACHE_BACKEND', 'memory')
+        ttl = app.config.get('USER_CACHE_TTL', 300)
+        if kind == 'memory':
+            self.backend = LRUBackend(maxsize=app.config.get('USER_CACHE_SIZE', 10000), ttl=ttl)
+        elif kind == 'redis':
+            import redis  # optional; only this backend needs it
+            self.backend = RedisBackend(redis.Redis.from_url(app.config['USER_CACHE_REDIS_URL']), ttl=ttl)
+        else:
+            raise ValueError(f"USER_CACHE_BACKEND must be 'memory' or 'redis', not {kind!r}")
+
+    def get(self, user_id):
+        """Snapshot for `user_id`, or None if no such user."""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+
+        snapshot = self.backend.get(user_id)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+
+        self.misses += 1
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        snapshot = UserSnapshot.from_user(user)
+        self.backend.set(user_id, snapshot)
+        return snapshot
+
+    def exists(self, user_id):
+        return self.get(user_id) is not None
+
+    def invalidate(self, *user_ids):
+        for user_id in user_ids:
+            self.backend.delete(int(user_id))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0
+        }
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user(mapper, connection, target):
+    # Remember the id; the entry is dropped once the change is committed
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('stale_user_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    user_ids = session.info.pop('stale_user_ids', None)
+    if user_ids:
+        user_cache.invalidate(*user_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back(session):
+    session.info.pop('stale_user_ids', None)
@@ -0,0 +1,162 @@
+# app/auth/dashboard.py
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.db import db
+from app.auth.models import User, Therapist
+from app.community.models import CommunityMessage, DirectMessage
+from app.journals.models import Journal
+from app.mood.models import Mood
+from app.instrumentation import request_latency, pool_usage
+
+
+class DashboardStats:
+    """Admin dashboard figures, refreshed off the request path.
+
+    Totals come from one aggregate query. Activity metrics (daily active
+    users from moods and journal entries, messages per day) are kept in
+    memory for the last `window_days` days and advanced by reading only
+    rows whose id is past the last one seen, plus rows created in the last
+    SYNC_OVERLAP seconds, so each refresh costs the same however large the
+    tables get. The overlap catches lower ids that committed late; ids it
+    has already counted are skipped.
+
+    Refresh queries run under `_refresh_lock` only; `_lock` is held just to
+    swap in the results, so `snapshot()` never waits on the database.
+    """
+
+    ACTIVITY_SOURCES = (
+        (Mood, Mood.user_id),
+        (Journal, Journal.user_id),
+    )
+    MESSAGE_SOURCES = (CommunityMessage, DirectMessage)
+    SYNC_OVERLAP = 60
+
+    def __init__(self, window_days=7):
+        self.window_days = window_days
+        self.totals = {}
+        self.refreshed_at = None
+        self._active = {}    # day -> set of user ids
+        self._messages = {}  # day -> count
+        self._watermarks = {}  # model -> last id seen
+        self._recent = {}  # model -> {id: created_at} counted within the overlap
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+
+    def refresh(self):
+        with self._refresh_lock:
+            totals = self._totals()
+            window_start = datetime.combine(
+                datetime.utcnow().date() - timedelta(days=self.window_days - 1), datetime.min.time()
+            )
+            # Watermarks only advance once every query has succeeded
+            watermarks, recent, activity, messages = {}, {}, [], []
+            for model, user_col in self.ACTIVITY_SOURCES:
+                rows, watermarks[model], recent[model] = self._new_rows(model, window_start, user_col)
+                activity += rows
+            for model in self.MESSAGE_SOURCES:
+                rows, watermarks[model], recent[model] = self._new_rows(model, window_start)
+                messages += rows
+
+            with self._lock:
+                self._apply(window_start, totals, activity, messages)
+                self._watermarks.update(watermarks)
+                self._recent.update(recent)
+
+    def _apply(self, window_start, totals, activity, messages):
+        for created_at, user_id in activity:
+            self._active.setdefault(created_at.date(), set()).add(user_id)
+        for (created_at,) in messages:
+            day = created_at.date()
+            self._messages[day] = self._messages.get(day, 0) + 1
+
+        cutoff = window_start.date()
+        self._active = {d: u for d, u in self._active.items() if d >= cutoff}
+        self._messages = {d: n for d, n in self._messages.items() if d >= cutoff}
+        self.totals = totals
+        self.refreshed_at = datetime.utcnow()
+
+    def _totals(self):
+        row = db.session.execute(db.select(
+            db.select(db.func.count()).select_from(User).scalar_subquery(),
+            db.func.count(Therapist.id),
+            db.func.count(Therapist.id).filter(Therapist.verified == False),
+        ).select_from(Therapist)).one()
+        return {
+            'total_users': row[0],
+            'total_therapists': row[1],
+            'pending_therapists': row[2]
+        }
+
+    def _new_rows(self, model, window_start, *columns):
+        """(created_at, columns...) rows added since the last refresh, and the
+        watermark and recently counted ids to store once they are applied."""
+        watermark = self._watermarks.get(model)
+        counted = self._recent.get(model, {})
+        since = datetime.utcnow() - timedelta(seconds=self.SYNC_OVERLAP)
+        query = db.session.query(model.id, model.created_at, *columns)
+        if watermark is None:
+            # First run: seed the window once by time, then follow the primary key
+            watermark = db.session.query(db.func.max(model.id)).scalar() or 0
+            query = query.filter(model.created_at >= window_start, model.id <= watermark)
+        else:
+            query = query.filter((model.id > watermark) | (model.created_at >= since))
+
+        rows, recent = [], {i: t for i, t in counted.items() if t >= since}
+        for row_id, created_at, *values in query:
+            watermark = max(watermark, row_id)
+            if row_id in counted or created_at is None:
+                continue
+            if created_at >= since:
+                recent[row_id] = created_at
+            if created_at >= window_start:
+                rows.append((created_at, *values))
+        return rows, watermark, recent
+
+    def start(self, app, interval):
+        """Refresh now, then every `interval` seconds on a daemon thread. The
+        thread starts even if this first refresh fails, so it is retried."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, args=(app, interval), name='dashboard-stats', daemon=True
+            )
+            self._thread.start()
+        try:
+            self.refresh()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception('Dashboard stats refresh failed; retrying in the background')
+
+    def _run(self, app, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                with app.app_context():
+                    self.refresh()
+            except Exception:
+                app.logger.exception('Dashboard stats refresh failed')
+
+    def snapshot(self):
+        today = datetime.utcnow().date()
+        days = [today - timedelta(days=i) for i in range(self.window_days)]
+        with self._lock:
+            active = {d.isoformat(): len(self._active.get(d, ())) for d in days}
+            messages = {d.isoformat(): self._messages.get(d, 0) for d in days}
+            return {
+                **self.totals,
+                'daily_active_users': active[today.isoformat()],
+                'daily_active_users_by_day': active,
+                'messages_by_day': messages,
+                'stats_refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None,
+                'system_health': {
+                    'db_pool': pool_usage(db.engine),
+                    'request_latency_seconds': request_latency.percentiles(50, 95, 99)
+                }
+            }
+
+
+dashboard_stats = DashboardStats()
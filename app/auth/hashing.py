@@ -0,0 +1,96 @@
+# app/auth/hashing.py
+import threading
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from app.db import bcrypt
+
+# Default cost per scheme: log2(N) for scrypt, iterations for pbkdf2,
+# log rounds for bcrypt.
+DEFAULT_COSTS = {'scrypt': 15, 'pbkdf2': 600000, 'bcrypt': 12}
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+BCRYPT_MAX_BYTES = 72
+
+
+class HashingBusy(Exception):
+    """Raised when every hashing slot is taken for longer than the wait budget."""
+
+
+class PasswordTooLong(ValueError):
+    """The password is longer than the configured scheme can hash."""
+
+
+_slots = None
+_lock = threading.Lock()
+
+
+def _semaphore():
+    global _slots
+    if _slots is None:
+        with _lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(current_app.config['PASSWORD_HASH_WORKERS'])
+    return _slots
+
+
+def _run(fn, *args):
+    """Run a KDF call on the request thread, at most PASSWORD_HASH_WORKERS at once.
+
+    This caps how much CPU hashing can take; it does not free the request
+    worker, which waits for its turn. A caller that waits longer than
+    PASSWORD_HASH_TIMEOUT seconds gets HashingBusy instead.
+    """
+    slots = _semaphore()
+    if not slots.acquire(timeout=current_app.config['PASSWORD_HASH_TIMEOUT']):
+        raise HashingBusy('Too many concurrent password operations')
+    try:
+        return fn(*args)
+    finally:
+        slots.release()
+
+
+def init_hashing(app):
+    """Fail at startup, not on the first login, if PASSWORD_SCHEME is unknown."""
+    scheme = app.config['PASSWORD_SCHEME']
+    if scheme not in DEFAULT_COSTS:
+        names = ', '.join(repr(name) for name in DEFAULT_COSTS)
+        raise ValueError(f'PASSWORD_SCHEME must be one of {names}, not {scheme!r}')
+
+
+def _scheme():
+    scheme = current_app.config['PASSWORD_SCHEME']
+    cost = current_app.config['PASSWORD_HASH_COST'] or DEFAULT_COSTS[scheme]
+    return scheme, int(cost)
+
+
+def _werkzeug_method(scheme, cost):
+    if scheme == 'scrypt':
+        return f'scrypt:{2 ** cost}:8:1'
+    return f'pbkdf2:sha256:{cost}'
+
+
+def hash_password(password):
+    scheme, cost = _scheme()
+    if scheme == 'bcrypt':
+        if len(password.encode('utf-8')) > BCRYPT_MAX_BYTES:
+            raise PasswordTooLong(f'Password must be at most {BCRYPT_MAX_BYTES} bytes')
+        return _run(bcrypt.generate_password_hash, password, cost).decode('utf-8')
+    return _run(generate_password_hash, password, _werkzeug_method(scheme, cost))
+
+
+def verify_password(password_hash, password):
+    if password_hash.startswith(BCRYPT_PREFIXES):
+        # bcrypt only ever saw the first 72 bytes; older releases truncated
+        # silently, so hashes made that way still verify
+        password = password.encode('utf-8')[:BCRYPT_MAX_BYTES]
+        return _run(bcrypt.check_password_hash, password_hash, password)
+    return _run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """True if `password_hash` was made with a different scheme or cost than configured."""
+    scheme, cost = _scheme()
+    if scheme == 'bcrypt':
+        return not password_hash.startswith(BCRYPT_PREFIXES) or int(password_hash[4:6]) != cost
+    return password_hash.split('$', 1)[0] != _werkzeug_method(scheme, cost)
@@ -0,0 +1,59 @@
+# app/auth/identity.py
+from functools import wraps
+
+from flask import g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt, get_jwt_identity
+
+
+class Identity:
+    """The caller as described by their access token, decoded once per request."""
+    __slots__ = ('id', 'role', 'communities')
+
+    def __init__(self, id, role, communities):
+        self.id = id
+        self.role = role
+        self.communities = communities
+
+    @classmethod
+    def from_claims(cls, identity, claims):
+        return cls(int(identity), claims.get('role'), frozenset(claims.get('communities', ())))
+
+
+def identity_claims(user, community_ids):
+    """Extra JWT claims that let routes authorize without loading the user.
+
+    `communities` is a snapshot from token issue for clients to display.
+    Joining or leaving doesn't update it, so membership checks read the
+    database instead.
+    """
+    return {'role': user.role, 'communities': sorted(community_ids)}
+
+
+def load_identity():
+    """Verify the request's access token and cache the caller on `g.identity`."""
+    verify_jwt_in_request()
+    g.identity = Identity.from_claims(get_jwt_identity(), get_jwt())
+    return g.identity
+
+
+def optional_identity():
+    """The caller's Identity if the request carries a valid access token, else None."""
+    if verify_jwt_in_request(optional=True) is None:
+        return None
+    g.identity = Identity.from_claims(get_jwt_identity(), get_jwt())
+    return g.identity
+
+
+def current_identity():
+    """The request's Identity, decoding the JWT only if no route has yet."""
+    return g.identity if 'identity' in g else load_identity()
+
+
+def identity_required(fn):
+    """Require a valid access token and expose the caller as `g.identity`."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        load_identity()
+        return fn(*args, **kwargs)
+
+    return wrapper
@@ -1,6 +1,6 @@
 from app.db import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.auth.hashing import hash_password, verify_password, needs_rehash
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -21,11 +21,22 @@ class User(db.Model):
     # Relationship (one-to-one)
     therapist_profile = db.relationship("Therapist", backref="user", uselist=False, cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Only outstanding reset tokens are ever looked up
+        db.Index('ix_users_reset_token', 'reset_token',
+                 postgresql_where=db.text('reset_token IS NOT NULL'),
+                 sqlite_where=db.text('reset_token IS NOT NULL')),
+    )
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash predates the configured scheme or cost."""
+        return needs_rehash(self.password_hash)
 
     @property
     def is_admin(self):
@@ -54,3 +65,14 @@ class Therapist(db.Model):
     profile_image = db.Column(db.Text, nullable=True)
     verified = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True, index=True)
+    token_type = db.Column(db.String(10), nullable=False)  # access | refresh
+    user_id = db.Column(db.Integer, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
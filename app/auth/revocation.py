@@ -0,0 +1,189 @@
+# app/auth/revocation.py
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.db import db, jwt, insert_ignore
+from app.auth.models import RevokedToken
+
+
+class MemoryRevocationStore:
+    """Revoked jtis in a dict, forgotten once the token would have expired
+    anyway. Per-process only; meant for tests and single-worker dev."""
+
+    def __init__(self):
+        self._revoked = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, token_type, user_id, expires_at):
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def is_revoked(self, jti):
+        expires_at = self._revoked.get(jti, False)
+        if expires_at is False:
+            return False
+        if expires_at is not None and expires_at < datetime.utcnow():
+            with self._lock:
+                self._revoked.pop(jti, None)
+            return False
+        return True
+
+
+class BloomFilter:
+    def __init__(self, capacity, hashes=7):
+        self.capacity = capacity
+        self.size = capacity * 10  # ~1% false positives at capacity with 7 hashes
+        self.hashes = hashes
+        self.bits = bytearray(self.size // 8 + 1)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=self.hashes * 4).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[i * 4:i * 4 + 4], 'little') % self.size
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SQLRevocationStore:
+    """Revoked tokens in the revoked_tokens table, fronted by a per-process
+    bloom filter.
+
+    Almost every check is for a live token, which the bloom filter rules out
+    in memory. Only bloom hits (revoked tokens and ~1% false positives) reach
+    the jti index, and their answers are cached.
+
+    Every `sync_interval` seconds the filter loads rows above the highest id
+    it has seen, plus every row revoked in the last SYNC_OVERLAP seconds.
+    The overlap catches lower ids that committed late and rows stamped by a
+    skewed clock. The filter is also rebuilt from scratch every
+    `full_reload_interval` seconds. If a sync fails, checks go to the
+    database until a sync succeeds, rather than trusting a stale filter.
+    """
+
+    # Most bloom-hit answers to remember before starting over
+    MAX_KNOWN = 10000
+    SYNC_OVERLAP = 60
+
+    def __init__(self, sync_interval=5, capacity=100000, full_reload_interval=300):
+        self.sync_interval = sync_interval
+        self.full_reload_interval = full_reload_interval
+        self.capacity = capacity
+        self._bloom = None
+        self._known = {}
+        self._last_id = 0
+        self._synced_at = None
+        self._next_sync = 0
+        self._next_full_reload = 0
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, token_type, user_id, expires_at):
+        # Revoking twice (e.g. logging out again with the same refresh token) is a no-op
+        db.session.execute(insert_ignore(RevokedToken, ('jti',)), [{
+            'jti': jti, 'token_type': token_type, 'user_id': user_id, 'expires_at': expires_at
+        }])
+        db.session.commit()
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+            self._known[jti] = True
+
+    def is_revoked(self, jti):
+        if time.monotonic() >= self._next_sync:
+            try:
+                self._sync()
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception('Revocation sync failed; checking tokens against the database')
+        if self._synced_at is None or time.monotonic() - self._synced_at > self.sync_interval:
+            return self._revoked_in_db(jti)
+        if jti not in self._bloom:
+            return False
+
+        revoked = self._known.get(jti)
+        if revoked is None:
+            revoked = self._revoked_in_db(jti)
+            if len(self._known) >= self.MAX_KNOWN:
+                self._known = {}
+            self._known[jti] = revoked
+        return revoked
+
+    def _revoked_in_db(self, jti):
+        return db.session.query(RevokedToken.query.filter_by(jti=jti).exists()).scalar()
+
+    def _sync(self):
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_sync:
+                return
+
+            if self._bloom is None or self._bloom.count > self._bloom.capacity or now >= self._next_full_reload:
+                # (Re)build from every still-live revocation
+                live = RevokedToken.query.filter(
+                    (RevokedToken.expires_at.is_(None)) | (RevokedToken.expires_at > datetime.utcnow())
+                )
+                rows = live.with_entities(RevokedToken.id, RevokedToken.jti).all()
+                bloom = BloomFilter(max(self.capacity, len(rows) * 2))
+                self._known = {}
+                self._next_full_reload = now + self.full_reload_interval
+            else:
+                bloom = self._bloom
+                rows = RevokedToken.query.filter(
+                    (RevokedToken.id > self._last_id) |
+                    (RevokedToken.revoked_at >= datetime.utcnow() - timedelta(seconds=self.SYNC_OVERLAP))
+                ).with_entities(RevokedToken.id, RevokedToken.jti).all()
+
+            added = False
+            for row_id, jti in rows:
+                if jti not in bloom:
+                    bloom.add(jti)
+                    added = True
+                self._last_id = max(self._last_id, row_id)
+            if added and bloom is self._bloom:
+                # Cached "not revoked" answers may be stale now
+                self._known = {k: v for k, v in self._known.items() if v}
+
+            self._bloom = bloom
+            self._synced_at = now
+            self._next_sync = now + self.sync_interval
+
+
+store = MemoryRevocationStore()
+
+
+def init_revocation(app):
+    global store
+    if app.config.get('TOKEN_REVOCATION_STORE', 'sql') == 'memory':
+        store = MemoryRevocationStore()
+    else:
+        store = SQLRevocationStore(
+            sync_interval=app.config.get('TOKEN_REVOCATION_SYNC_SECONDS', 5),
+            full_reload_interval=app.config.get('TOKEN_REVOCATION_RELOAD_SECONDS', 300)
+        )
+
+
+def revoke_token(payload):
+    """Revoke the decoded JWT `payload` until it expires."""
+    expires_at = datetime.utcfromtimestamp(payload['exp']) if 'exp' in payload else None
+    sub = payload.get(current_app.config['JWT_IDENTITY_CLAIM'])
+    store.revoke(
+        payload['jti'],
+        payload.get('type', 'access'),
+        int(sub) if sub is not None and str(sub).isdigit() else None,
+        expires_at
+    )
+
+
+@jwt.token_in_blocklist_loader
+def is_token_revoked(jwt_header, jwt_payload):
+    return store.is_revoked(jwt_payload['jti'])
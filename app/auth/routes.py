@@ -1,11 +1,24 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from app import db
 from app.auth.models import User, Therapist
+from app.community.models import CommunityMembership
+from app.auth.hashing import HashingBusy, PasswordTooLong
+from app.auth.identity import identity_claims
+from app.auth.revocation import revoke_token
+from app.auth.dashboard import dashboard_stats
+from app.auth.admin import (
+    InvalidBatch, batch_response, delete_users,
+    USER_ACTIONS, USER_FILTERS, THERAPIST_ACTIONS, THERAPIST_FILTERS
+)
+from app.auth.cache import user_cache
+from app.jobs.queue import enqueue
 from datetime import datetime, timedelta
 import secrets
 from functools import wraps
 from flask_jwt_extended import (
     create_access_token,
+    create_refresh_token,
+    decode_token,
     jwt_required,
     get_jwt_identity,
     get_jwt,
@@ -27,6 +40,33 @@ def admin_required(fn):
 
     return wrapper
 
+
+def issue_access_token(user):
+    """Create a JWT access token carrying the user's role and community
+    memberships so routes can authorize without loading the user."""
+    community_ids = db.session.scalars(
+        db.select(CommunityMembership.community_id).where(CommunityMembership.user_id == user.id)
+    ).all()
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims=identity_claims(user, community_ids)
+    )
+
+
+@auth_bp.errorhandler(HashingBusy)
+def hashing_busy(e):
+    return jsonify({'message': 'Server is busy, please try again shortly'}), 503
+
+
+@auth_bp.errorhandler(PasswordTooLong)
+def password_too_long(e):
+    return jsonify({'message': str(e)}), 400
+
+
+@auth_bp.errorhandler(InvalidBatch)
+def invalid_batch(e):
+    return jsonify({'message': str(e)}), 400
+
 # =====================================
 # REGISTER (User or Therapist)
 # =====================================
@@ -109,6 +149,14 @@ def login():
     if not user or not user.check_password(password):
         return jsonify({'message': 'Invalid email or password'}), 401
 
+    # Upgrade hashes made with an older scheme or cost while we have the password
+    if user.password_needs_rehash():
+        try:
+            user.set_password(password)
+            db.session.commit()
+        except PasswordTooLong:
+            db.session.rollback()  # keep the old hash rather than refuse the login
+
     # Include therapist info if applicable
     therapist_data = None
     if user.role == 'therapist' and user.therapist_profile:
@@ -120,12 +168,13 @@ def login():
             'verified': therapist.verified
         }
 
-    # Create a JWT access token that includes the user's role in claims.
-    access_token = create_access_token(identity=user.id, additional_claims={"role": user.role})
+    access_token = issue_access_token(user)
+    refresh_token = create_refresh_token(identity=str(user.id))
 
     return jsonify({
         'message': 'Login successful',
         'access_token': access_token,
+        'refresh_token': refresh_token,
         'user': {
             'id': user.id,
             'username': user.username,
@@ -136,6 +185,41 @@ def login():
     }), 200
 
 
+# =====================================
+# REFRESH (new access token from a refresh token)
+# =====================================
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    # Reload the user so role and membership claims are current
+    user = User.query.get(int(get_jwt_identity()))
+    if not user:
+        return jsonify({'message': 'User not found'}), 401
+
+    return jsonify({'access_token': issue_access_token(user)}), 200
+
+
+# =====================================
+# LOGOUT (revoke the presented token, and optionally a refresh token)
+# =====================================
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    revoke_token(get_jwt())
+
+    data = request.get_json(silent=True) or {}
+    if data.get('refresh_token'):
+        try:
+            payload = decode_token(data['refresh_token'])
+        except Exception:
+            return jsonify({'message': 'Invalid refresh token'}), 400
+        if payload.get(current_app.config['JWT_IDENTITY_CLAIM']) != get_jwt_identity():
+            return jsonify({'message': 'Refresh token belongs to another user'}), 403
+        revoke_token(payload)
+
+    return jsonify({'message': 'Logged out'}), 200
+
+
 # =====================================
 # FORGOT PASSWORD
 # =====================================
@@ -153,13 +237,11 @@ def forgot_password():
 
     user.reset_token = secrets.token_urlsafe(32)
     user.reset_token_expires = datetime.utcnow() + timedelta(hours=1)
+    # The email goes out from the job worker; the token is only ever in the email
+    enqueue('password_reset_email', {'user_id': user.id})
     db.session.commit()
 
-    # In production: email the reset token instead
-    return jsonify({
-        'message': 'Reset token generated successfully',
-        'reset_token': user.reset_token
-    }), 200
+    return jsonify({'message': 'Password reset email sent'}), 200
 
 
 # =====================================
@@ -201,20 +283,16 @@ def reset_password():
 @auth_bp.route('/admin/dashboard', methods=['GET'])
 @admin_required
 def admin_dashboard():
-    """Return simple statistics for admin dashboard."""
-    total_users = User.query.count()
-    total_therapists = Therapist.query.count()
-    pending_therapists = Therapist.query.filter_by(verified=False).count()
-
-    # Simple system health metric placeholder (could be extended)
-    system_health = '92%'
-
-    return jsonify({
-        'total_users': total_users,
-        'total_therapists': total_therapists,
-        'pending_therapists': pending_therapists,
-        'system_health': system_health
-    }), 200
+    """Return statistics for the admin dashboard.
+
+    Figures come from a cache refreshed every DASHBOARD_REFRESH_SECONDS by
+    a background thread, started on the first dashboard request.
+    """
+    dashboard_stats.start(
+        current_app._get_current_object(),
+        current_app.config['DASHBOARD_REFRESH_SECONDS']
+    )
+    return jsonify(dashboard_stats.snapshot()), 200
 
 
 @auth_bp.route('/admin/users', methods=['GET'])
@@ -265,11 +343,23 @@ def admin_delete_user(user_id):
     user = User.query.get(user_id)
     if not user:
         return jsonify({'message': 'User not found'}), 404
-    db.session.delete(user)
+    delete_users([user_id])
     db.session.commit()
+    user_cache.invalidate(user_id)
     return jsonify({'message': 'User deleted'}), 200
 
 
+# Batch endpoints. Body: {"action": ..., "ids": [...]} or {"action": ..., "filter": {...}},
+# optionally "dry_run": true to only count matches. Send Accept: application/x-ndjson
+# to get a progress line per committed chunk.
+@auth_bp.route('/admin/users/batch', methods=['POST'])
+@admin_required
+def admin_batch_users():
+    """promote | demote | delete many users. The caller is never demoted or deleted."""
+    data = request.get_json() or {}
+    return batch_response(USER_ACTIONS, User, data, USER_FILTERS, exclude_ids=[int(get_jwt_identity())])
+
+
 @auth_bp.route('/admin/therapists', methods=['GET'])
 @admin_required
 def admin_list_therapists():
@@ -307,3 +397,11 @@ def admin_delete_therapist(therapist_id):
     db.session.delete(t)
     db.session.commit()
     return jsonify({'message': 'Therapist deleted'}), 200
+
+
+@auth_bp.route('/admin/therapists/batch', methods=['POST'])
+@admin_required
+def admin_batch_therapists():
+    """verify | delete many therapist profiles."""
+    data = request.get_json() or {}
+    return batch_response(THERAPIST_ACTIONS, Therapist, data, THERAPIST_FILTERS)
@@ -0,0 +1,708 @@
+# app/bench.py
+"""Benchmark harness: seed a database at production-like volume, then time
+the hot routes of every blueprint through the Flask test client.
+
+    flask bench seed --scale 0.01 --reset
+    flask bench run --requests 200 --output bench-results.json
+    flask bench compare before.json after.json
+    flask bench startup --top 20
+    flask bench mood-messages
+    flask bench hashing --threads 8
+    flask bench serialize --rows 10000
+
+Point DATABASE_URL at a throwaway SQLite file or local Postgres database;
+`seed --reset` drops every table first.
+"""
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import timeit
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy import event
+
+from app.db import db
+from app.auth.models import User, Therapist
+from app.auth.hashing import hash_password
+from app.auth.identity import identity_claims
+from app.community.models import (
+    Community, CommunityMembership, CommunityMessage, DirectMessage, Connection
+)
+from app.journals.models import Journal, JOURNAL_SERIALIZER
+from app.journals.search import rebuild_search_index
+from app.mood.models import Mood, MOOD_SERIALIZER
+from app.mood.utilis import CATALOG, DEFAULT_KEY, DEFAULT_LOCALE, get_mood_message
+
+bench = AppGroup('bench', help='Seed benchmark data and time the API.')
+
+BENCH_PASSWORD = 'bench-password'
+SEED_DAYS = 365
+CHUNK = 10000
+
+# Row counts at --scale 1
+VOLUMES = {
+    'users': 100000,
+    'moods': 5000000,
+    'journals': 1000000,
+    'communities': 200,
+    'memberships': 400000,
+    'community_messages': 1000000,
+    'direct_messages': 500000,
+    'connections': 300000,
+}
+
+WORDS = (
+    'today felt calm anxious tired hopeful walk sleep family work friends '
+    'breathing grateful heavy light therapy progress small steps morning night'
+).split()
+# Rarer terms, one per journal entry, so search has selective queries too
+TOPICS = [f'topic{i}' for i in range(5000)]
+
+
+def _chunks(rows, size=CHUNK):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(model, rows):
+    """Executemany-insert `rows` in chunks, committing as it goes."""
+    total = 0
+    for batch in _chunks(rows):
+        db.session.execute(db.insert(model), batch)
+        db.session.commit()
+        total += len(batch)
+    click.echo(f'  {model.__tablename__}: {total} rows')
+    return total
+
+
+def _advance_sequences(*models):
+    """Move Postgres id sequences past ids that were inserted explicitly, so
+    the next ordinary insert doesn't collide. SQLite needs nothing."""
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__tablename__
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+        ))
+    db.session.commit()
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+@bench.command('seed')
+@click.option('--scale', default=1.0, show_default=True,
+              help='Multiplier on the default volumes (100k users, 5M moods, 1M journals...).')
+@click.option('--seed', 'seed', default=42, show_default=True, help='Random seed.')
+@click.option('--reset', is_flag=True, help='Drop and recreate all tables first.')
+def seed(scale, seed, reset):
+    """Fill the database with deterministic benchmark data."""
+    from app.mood.routes import backfill_rollups
+
+    if reset:
+        db.drop_all()
+        db.create_all()
+    elif db.session.query(User.id).first() is not None:
+        raise click.UsageError('Database is not empty; pass --reset to recreate it.')
+
+    rng = random.Random(seed)
+    n = {name: max(1, int(count * scale)) for name, count in VOLUMES.items()}
+    n['communities'] = min(n['communities'], n['users'])
+    now = datetime.utcnow()
+
+    def when():
+        return now - timedelta(seconds=rng.randrange(SEED_DAYS * 86400))
+
+    def user():
+        return rng.randint(1, n['users'])
+
+    started = time.perf_counter()
+    click.echo(f'Seeding {current_app.config["SQLALCHEMY_DATABASE_URI"]} at scale {scale}')
+
+    # One hash shared by every user: hashing 100k passwords would dominate seeding
+    password_hash = hash_password(BENCH_PASSWORD)
+    _insert(User, ({
+        'id': i,
+        'username': f'bench{i}',
+        'email': f'bench{i}@example.com',
+        'password_hash': password_hash,
+        'role': 'admin' if i == 1 else ('therapist' if i % 100 == 0 else 'user'),
+        'is_verified': True,
+        'created_at': when(),
+    } for i in range(1, n['users'] + 1)))
+    _insert(Therapist, ({
+        'user_id': i,
+        'specialty': rng.choice(('anxiety', 'depression', 'grief', 'stress')),
+        'verified': rng.random() < 0.8,
+        'created_at': when(),
+    } for i in range(100, n['users'] + 1, 100)))
+
+    labels = [label for label in CATALOG[DEFAULT_LOCALE] if label != DEFAULT_KEY]
+    _insert(Mood, ({
+        'user_id': user(),
+        'emotion_label': rng.choice(labels),
+        'created_at': when(),
+    } for _ in range(n['moods'])))
+    click.get_current_context().invoke(backfill_rollups, batch_size=CHUNK)
+
+    _insert(Journal, ({
+        'user_id': user(),
+        'title': _text(rng, 4),
+        'content': f'{_text(rng, rng.randint(20, 200))} {rng.choice(TOPICS)}',
+        'is_private': rng.random() < 0.3,
+        'created_at': when(),
+    } for _ in range(n['journals'])))
+    # Core inserts bypass the incremental index maintenance
+    with db.engine.begin() as connection:
+        rebuild_search_index(connection)
+
+    _insert(Community, ({
+        'id': i,
+        'name': f'bench community {i}',
+        'description': _text(rng, 12),
+        'owner_id': i,
+        'created_at': when(),
+    } for i in range(1, n['communities'] + 1)))
+    # Users and communities get explicit ids so later rows can refer to them
+    _advance_sequences(User, Community)
+
+    # Skewed sizes: a few very large communities and a long tail
+    members = set((i, i) for i in range(1, n['communities'] + 1))
+    target = min(n['memberships'], n['users'] * n['communities'] // 2) + n['communities']
+    while len(members) < target:
+        community_id = min(int(rng.paretovariate(1.2)), n['communities'])
+        members.add((user(), community_id))
+    _insert(CommunityMembership, ({
+        'user_id': user_id,
+        'community_id': community_id,
+        'role': 'owner' if user_id == community_id else 'member',
+        'joined_at': when(),
+    } for user_id, community_id in sorted(members)))
+
+    members = sorted(members)
+    _insert(CommunityMessage, ({
+        'community_id': community_id,
+        'user_id': user_id,
+        'content': _text(rng, rng.randint(3, 40)),
+        'created_at': when(),
+    } for user_id, community_id in (rng.choice(members) for _ in range(n['community_messages']))))
+
+    def dm():
+        sender = user()
+        recipient = user()
+        while recipient == sender and n['users'] > 1:
+            recipient = user()
+        return {
+            'sender_id': sender,
+            'recipient_id': recipient,
+            'content': _text(rng, rng.randint(3, 30)),
+            'created_at': when(),
+            'is_read': rng.random() < 0.7,
+        }
+    _insert(DirectMessage, (dm() for _ in range(n['direct_messages'])))
+
+    # Same derivations as the dm_unread_counters / dm_threads migrations
+    db.session.execute(db.text(
+        "INSERT INTO dm_unread_counters (user_id, unread_count) "
+        "SELECT recipient_id, COUNT(*) FROM direct_messages "
+        "WHERE is_read = false GROUP BY recipient_id"
+    ))
+    db.session.execute(db.text(
+        "INSERT INTO dm_threads "
+        "(user_low_id, user_high_id, last_message_id, last_at, unread_low, unread_high) "
+        "SELECT low_id, high_id, MAX(id), MAX(created_at), "
+        "SUM(CASE WHEN recipient_id = low_id AND is_read = false THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN recipient_id = high_id AND is_read = false THEN 1 ELSE 0 END) "
+        "FROM (SELECT id, created_at, recipient_id, is_read, "
+        "CASE WHEN sender_id < recipient_id THEN sender_id ELSE recipient_id END AS low_id, "
+        "CASE WHEN sender_id < recipient_id THEN recipient_id ELSE sender_id END AS high_id "
+        "FROM direct_messages) AS dm "
+        "GROUP BY low_id, high_id"
+    ))
+    db.session.commit()
+
+    pairs = set()
+    while len(pairs) < min(n['connections'], n['users'] * (n['users'] - 1) // 4):
+        a, b = user(), user()
+        if a != b and (b, a) not in pairs:
+            pairs.add((a, b))
+    _insert(Connection, ({
+        'requester_id': a,
+        'addressee_id': b,
+        'status': rng.choice(('pending', 'accepted', 'accepted', 'accepted')),
+        'created_at': when(),
+    } for a, b in sorted(pairs)))
+
+    click.echo(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+
+class Scenario:
+    """One timed route. `build(rng)` returns (method, path, json body, user id or None)."""
+
+    def __init__(self, name, build, refresh=False):
+        self.name = name
+        self.build = build
+        self.refresh = refresh
+
+
+def _scenarios(sample):
+    """Scenarios drawn from `sample`, a dict of ids that exist in the seeded data."""
+    users = sample['users']
+    memberships = sample['memberships']
+    communities = sample['communities']
+    label = sample['labels']
+
+    def member_post(rng):
+        user_id, community_id = rng.choice(memberships)
+        return 'POST', f'/community/{community_id}/message', {'content': _text(rng, 10)}, user_id
+
+    def own(path):
+        """GET `path` for a random user, as that user."""
+        def build(rng):
+            user_id = rng.choice(users)
+            return 'GET', path.format(user_id=user_id), None, user_id
+        return build
+
+    def direct(rng):
+        sender, recipient = rng.sample(users, 2)
+        return 'POST', '/community/message/direct', {
+            'recipient_id': recipient, 'content': _text(rng, 10)
+        }, sender
+
+    return [
+        Scenario('auth.login', lambda rng: ('POST', '/auth/login', {
+            'email': f'bench{rng.choice(users)}@example.com', 'password': BENCH_PASSWORD
+        }, None)),
+        Scenario('auth.refresh', lambda rng: ('POST', '/auth/refresh', None, rng.choice(users)),
+                 refresh=True),
+        Scenario('mood.add_mood', lambda rng: ('POST', '/mood/add-mood', {
+            'emotion_label': rng.choice(label)
+        }, rng.choice(users))),
+        Scenario('mood.get_mood', lambda rng: ('GET', f'/mood/{rng.choice(users)}', None, None)),
+        Scenario('mood.get_mood_summary',
+                 lambda rng: ('GET', f'/mood/{rng.choice(users)}/summary?bucket=week', None, None)),
+        Scenario('journals.get_entries', lambda rng: ('GET', '/journals/', None, None)),
+        Scenario('journals.get_entries_by_user',
+                 lambda rng: ('GET', f'/journals/?user_id={rng.choice(users)}', None, None)),
+        Scenario('journals.search_common',
+                 lambda rng: ('GET', f'/journals/search?q={rng.choice(WORDS)}', None, None)),
+        Scenario('journals.search_rare',
+                 lambda rng: ('GET', f'/journals/search?q={rng.choice(TOPICS)}', None, rng.choice(users))),
+        Scenario('journals.create_entry', lambda rng: ('POST', '/journals/add_journal', {
+            'title': _text(rng, 4), 'content': _text(rng, 80)
+        }, rng.choice(users))),
+        Scenario('community.list_communities', lambda rng: ('GET', '/community/', None, None)),
+        Scenario('community.get_messages',
+                 lambda rng: ('GET', f'/community/{rng.choice(communities)}/messages', None, None)),
+        Scenario('community.post_message', member_post),
+        Scenario('community.send_direct_message', direct),
+        Scenario('community.get_inbox',
+                 lambda rng: ('GET', f'/community/messages/inbox/{rng.choice(users)}', None, None)),
+        Scenario('community.unread_count', own('/community/messages/unread-count/{user_id}')),
+        Scenario('community.list_threads', own('/community/threads/{user_id}')),
+        Scenario('community.list_connections',
+                 lambda rng: ('GET', f'/community/connections/{rng.choice(users)}', None, None)),
+    ]
+
+
+def _sample(rng, size):
+    """Ids to drive requests with, read once before timing starts."""
+    max_user = db.session.query(db.func.max(User.id)).scalar()
+    if not max_user:
+        raise click.UsageError('No users found; run `flask bench seed` first.')
+    users = sorted({rng.randint(1, max_user) for _ in range(size)})
+    users = [u for (u,) in db.session.query(User.id).filter(User.id.in_(users))]
+    memberships = db.session.query(CommunityMembership.user_id, CommunityMembership.community_id)\
+        .filter(CommunityMembership.user_id.in_(users)).all() or \
+        db.session.query(CommunityMembership.user_id, CommunityMembership.community_id).limit(size).all()
+    communities = [c for (c,) in db.session.query(Community.id).limit(size)]
+    labels = [label for label in CATALOG[DEFAULT_LOCALE] if label != DEFAULT_KEY]
+    return {
+        'users': users,
+        'memberships': [tuple(m) for m in memberships],
+        'communities': communities,
+        'labels': labels,
+    }
+
+
+def _tokens(user_ids):
+    """Access and refresh tokens per user, as login would issue them."""
+    memberships = {}
+    for user_id, community_id in db.session.query(
+            CommunityMembership.user_id, CommunityMembership.community_id
+    ).filter(CommunityMembership.user_id.in_(user_ids)):
+        memberships.setdefault(user_id, []).append(community_id)
+
+    tokens = {}
+    for user in User.query.filter(User.id.in_(user_ids)):
+        tokens[user.id] = (
+            create_access_token(identity=str(user.id),
+                                additional_claims=identity_claims(user, memberships.get(user.id, []))),
+            create_refresh_token(identity=str(user.id))
+        )
+    return tokens
+
+
+def percentile(samples, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))]
+
+
+def _time(client, scenario, rng, tokens, count):
+    """Send `count` requests; returns (durations, errors, SQL statements issued)."""
+    durations, errors, statements = [], 0, [0]
+
+    def count_statement(*args):
+        statements[0] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', count_statement)
+    try:
+        for _ in range(count):
+            method, path, body, user_id = scenario.build(rng)
+            headers = {}
+            if user_id is not None:
+                access, refresh = tokens[user_id]
+                headers['Authorization'] = f'Bearer {refresh if scenario.refresh else access}'
+            started = time.perf_counter()
+            response = client.open(path, method=method, json=body, headers=headers)
+            response.get_data()
+            durations.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count_statement)
+    return durations, errors, statements[0]
+
+
+def _summarize(durations, errors, statements):
+    durations = sorted(durations)
+    total = sum(durations)
+    return {
+        'requests': len(durations),
+        'errors': errors,
+        'queries_per_request': round(statements / len(durations), 2),
+        'p50_ms': round(percentile(durations, 50) * 1000, 3),
+        'p95_ms': round(percentile(durations, 95) * 1000, 3),
+        'p99_ms': round(percentile(durations, 99) * 1000, 3),
+        'mean_ms': round(total / len(durations) * 1000, 3),
+        'throughput_rps': round(len(durations) / total, 1) if total else None,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(current_app.root_path)
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _dataset():
+    models = (User, Mood, Journal, Community, CommunityMembership,
+              CommunityMessage, DirectMessage, Connection)
+    return {m.__tablename__: db.session.query(db.func.count()).select_from(m).scalar() for m in models}
+
+
+@bench.command('run')
+@click.option('--requests', 'count', default=200, show_default=True, help='Timed requests per route.')
+@click.option('--warmup', default=20, show_default=True, help='Untimed requests per route first.')
+@click.option('--route', 'routes', multiple=True, help='Only run these scenarios (repeatable).')
+@click.option('--seed', 'seed', default=42, show_default=True, help='Random seed.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write JSON results here.')
+def run(count, warmup, routes, seed, output):
+    """Time each route with a single client and report latency percentiles."""
+    rng = random.Random(seed)
+    sample = _sample(rng, 200)
+    tokens = _tokens(sample['users'])
+    scenarios = [s for s in _scenarios(sample) if not routes or s.name in routes]
+    client = current_app.test_client()
+
+    results = {}
+    click.echo(f'{"route":34} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"req/s":>8} '
+               f'{"queries":>7} {"errors":>6}')
+    for scenario in scenarios:
+        _time(client, scenario, rng, tokens, warmup)
+        durations, errors, statements = _time(client, scenario, rng, tokens, count)
+        result = results[scenario.name] = _summarize(durations, errors, statements)
+        click.echo(f'{scenario.name:34} {result["p50_ms"]:9.2f} {result["p95_ms"]:9.2f} '
+                   f'{result["p99_ms"]:9.2f} {result["throughput_rps"]:8.1f} '
+                   f'{result["queries_per_request"]:7.2f} {errors:6d}')
+
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'database': db.engine.dialect.name,
+            'python': platform.python_version(),
+            'requests_per_route': count,
+            'warmup': warmup,
+            'seed': seed,
+        },
+        'dataset': _dataset(),
+        'routes': results,
+    }
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        click.echo(f'Wrote {output}')
+
+
+@bench.command('compare')
+@click.argument('before', type=click.File())
+@click.argument('after', type=click.File())
+@click.option('--threshold', default=10.0, show_default=True,
+              help='Percent p95 slowdown that counts as a regression.')
+def compare(before, after, threshold):
+    """Diff two `bench run` reports; exits 1 if any route regressed."""
+    before, after = json.load(before), json.load(after)
+    click.echo(f'{before["meta"].get("commit")} -> {after["meta"].get("commit")}')
+    click.echo(f'{"route":34} {"p50 ms":>19} {"p95 ms":>19} {"change":>8} {"queries":>15}')
+
+    regressed = []
+    for name, new in after['routes'].items():
+        old = before['routes'].get(name)
+        if old is None:
+            click.echo(f'{name:34} {"(new)":>19}')
+            continue
+        change = (new['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0.0
+        flag = '  REGRESSION' if change > threshold else ''
+        if flag:
+            regressed.append(name)
+        # Reports from before statement counting have no queries_per_request
+        queries = (f'{old["queries_per_request"]:7.2f}->{new["queries_per_request"]:<7.2f}'
+                   if 'queries_per_request' in old and 'queries_per_request' in new else '')
+        click.echo(f'{name:34} {old["p50_ms"]:9.2f}->{new["p50_ms"]:<9.2f}'
+                   f'{old["p95_ms"]:9.2f}->{new["p95_ms"]:<9.2f}{change:+7.1f}% {queries:>15}{flag}')
+
+    if regressed:
+        raise SystemExit(1)
+
+
+# Runs in a fresh interpreter, outside any click context, like a web worker
+STARTUP_PROBE = (
+    'import sys, time\n'
+    'started = time.perf_counter()\n'
+    'from app import create_app\n'
+    'imported = time.perf_counter()\n'
+    'create_app()\n'
+    'print(f"STARTUP {imported - started} {time.perf_counter() - imported}", file=sys.stderr)\n'
+)
+
+
+def _parse_importtime(stderr):
+    """(modules, import_s, create_s) from `python -X importtime` output plus the probe line."""
+    modules, timings = [], (None, None)
+    for line in stderr.splitlines():
+        if line.startswith('STARTUP '):
+            timings = tuple(float(v) for v in line.split()[1:3])
+        elif line.startswith('import time:'):
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            if self_us.strip().isdigit():
+                modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules, timings[0], timings[1]
+
+
+@bench.command('startup')
+@click.option('--top', default=20, show_default=True, help='Rows per table.')
+@click.option('--eager', is_flag=True, help='Profile with DEFER_IMPORTS=false.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write JSON results here.')
+def startup(top, eager, output):
+    """Profile a cold `import app; create_app()` with python -X importtime."""
+    env = dict(os.environ, DEFER_IMPORTS='false' if eager else 'true')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_PROBE],
+        cwd=os.path.dirname(current_app.root_path), env=env, capture_output=True, text=True
+    )
+    modules, import_s, create_s = _parse_importtime(proc.stderr)
+    if proc.returncode or import_s is None:
+        raise click.ClickException(f'Startup probe failed:\n{proc.stderr[-2000:]}')
+
+    packages = {}
+    for name, self_us, _ in modules:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    packages = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    slowest = sorted(modules, key=lambda m: m[2], reverse=True)[:top]
+
+    click.echo(f'{"deferred" if not eager else "eager"} imports: '
+               f'import app {import_s * 1000:.0f} ms, create_app() {create_s * 1000:.0f} ms, '
+               f'{len(modules)} modules')
+    click.echo(f'\n{"package":40} {"self ms":>9}')
+    for package, self_us in packages:
+        click.echo(f'{package:40} {self_us / 1000:9.1f}')
+    click.echo(f'\n{"module":40} {"cumulative ms":>14}')
+    for name, _, cumulative_us in slowest:
+        click.echo(f'{name:40} {cumulative_us / 1000:14.1f}')
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump({
+                'meta': {'commit': _git_commit(), 'deferred': not eager,
+                         'python': platform.python_version()},
+                'import_ms': round(import_s * 1000, 1),
+                'create_app_ms': round(create_s * 1000, 1),
+                'modules': len(modules),
+                'packages_self_ms': {p: round(us / 1000, 1) for p, us in packages},
+                'slowest_modules_ms': {n: round(us / 1000, 1) for n, _, us in slowest},
+            }, f, indent=2, sort_keys=True)
+        click.echo(f'Wrote {output}')
+
+
+def _per_call_us(fn, calls, repeat):
+    """Best-of-`repeat` microseconds per call over `calls` calls."""
+    return min(timeit.repeat(fn, number=calls, repeat=repeat)) / calls * 1e6
+
+
+def _legacy_mood_message(emotion_label, _rng=random.Random()):
+    # Stand-in for the lookup before the catalog: a fresh dict of lists per call
+    messages = {emotion: list(lines) for emotion, lines in CATALOG[DEFAULT_LOCALE].items()}
+    return _rng.choice(messages.get(emotion_label.lower(), messages[DEFAULT_KEY]))
+
+
+@bench.command('mood-messages')
+@click.option('--calls', default=100000, show_default=True, help='Calls per timing run.')
+@click.option('--repeat', default=5, show_default=True, help='Timing runs; the best is reported.')
+def mood_messages(calls, repeat):
+    """Per-call cost of get_mood_message against the per-call dict it replaced."""
+    cases = [
+        ('before: dict rebuilt per call', lambda: _legacy_mood_message('happy')),
+        ('catalog, exact label', lambda: get_mood_message('happy')),
+        ('catalog, mixed-case label', lambda: get_mood_message('Happy')),
+        ('catalog, unknown label', lambda: get_mood_message('elated')),
+        ('catalog, unknown locale', lambda: get_mood_message('happy', 'xx')),
+    ]
+    click.echo(f'{"lookup":34} {"us/call":>9}')
+    for name, fn in cases:
+        click.echo(f'{name:34} {_per_call_us(fn, calls, repeat):9.3f}')
+
+
+HASH_SETTINGS = ('scrypt:14', 'scrypt:15', 'pbkdf2:100000', 'pbkdf2:600000', 'bcrypt:10', 'bcrypt:12')
+
+
+def _login_storm(user_ids, threads, logins):
+    """POST /auth/login `logins` times from `threads` clients at once.
+    Returns (wall seconds, per-login durations, error count)."""
+    app = current_app._get_current_object()
+    durations, errors = [], []
+    remaining = iter(range(logins))
+    lock = threading.Lock()
+
+    def client_loop():
+        client = app.test_client()
+        while True:
+            with lock:
+                i = next(remaining, None)
+            if i is None:
+                return
+            started = time.perf_counter()
+            response = client.post('/auth/login', json={
+                'email': f'bench{user_ids[i % len(user_ids)]}@example.com', 'password': BENCH_PASSWORD
+            })
+            with lock:
+                durations.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+
+    workers = [threading.Thread(target=client_loop) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - started, durations, len(errors)
+
+
+@bench.command('hashing')
+@click.option('--setting', 'settings', multiple=True, metavar='SCHEME:COST',
+              help=f'Password scheme and cost to try (repeatable). Default: {", ".join(HASH_SETTINGS)}.')
+@click.option('--threads', default=8, show_default=True, help='Concurrent clients.')
+@click.option('--logins', default=40, show_default=True, help='Logins per setting.')
+def hashing(settings, threads, logins):
+    """Login throughput at several password hash costs.
+
+    Sets the bench users' password to each SCHEME:COST in turn and logs
+    them in concurrently; the original hashes are restored afterwards.
+    """
+    user_ids = _sample(random.Random(0), 50)['users']
+    original = dict(db.session.query(User.id, User.password_hash).filter(User.id.in_(user_ids)))
+    config = current_app.config
+    saved = config['PASSWORD_SCHEME'], config['PASSWORD_HASH_COST']
+
+    click.echo(f'{"setting":20} {"logins/s":>9} {"p50 ms":>9} {"p95 ms":>9} {"errors":>6}')
+    try:
+        for setting in settings or HASH_SETTINGS:
+            scheme, _, cost = setting.partition(':')
+            config['PASSWORD_SCHEME'], config['PASSWORD_HASH_COST'] = scheme, cost or None
+            db.session.execute(db.update(User).where(User.id.in_(user_ids))
+                               .values(password_hash=hash_password(BENCH_PASSWORD)))
+            db.session.commit()
+
+            wall, durations, errors = _login_storm(user_ids, threads, logins)
+            durations.sort()
+            click.echo(f'{setting:20} {len(durations) / wall:9.1f} {percentile(durations, 50) * 1000:9.1f} '
+                       f'{percentile(durations, 95) * 1000:9.1f} {errors:6d}')
+    finally:
+        config['PASSWORD_SCHEME'], config['PASSWORD_HASH_COST'] = saved
+        db.session.execute(db.update(User).execution_options(synchronize_session=False),
+                           [{'id': i, 'password_hash': h} for i, h in original.items()])
+        db.session.commit()
+
+
+def _best_ms(fn, repeat):
+    """Best-of-`repeat` milliseconds for `fn()`, each run on an empty identity map."""
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+@bench.command('serialize')
+@click.option('--rows', default=10000, show_default=True, help='Rows serialized per model.')
+@click.option('--repeat', default=3, show_default=True, help='Timing runs; the best is reported.')
+def serialize(rows, repeat):
+    """Query, serialize and JSON-encode `--rows` rows per model, through ORM
+    objects and to_dict (before) and through RowSerializer column tuples
+    (after)."""
+    from app.community.routes import to_dict, ROW_SERIALIZERS
+
+    cases = [
+        ('journal_entries', Journal, Journal.to_dict, JOURNAL_SERIALIZER),
+        ('moods', Mood, Mood.to_dict, MOOD_SERIALIZER),
+        ('community_messages', CommunityMessage, to_dict, ROW_SERIALIZERS[CommunityMessage]),
+        ('direct_messages', DirectMessage, to_dict, ROW_SERIALIZERS[DirectMessage]),
+    ]
+    dumps = current_app.json.dumps
+    click.echo(f'JSON provider: {type(current_app.json).__name__}')
+    click.echo(f'{"model":20} {"rows":>7} {"to_dict ms":>11} {"columns ms":>11} {"speedup":>8}')
+    for name, model, to_dict_, serializer in cases:
+        query = model.query.order_by(model.id).limit(rows)
+        count = query.count()
+        before = _best_ms(lambda: dumps([to_dict_(obj) for obj in query.all()]), repeat)
+        after = _best_ms(lambda: dumps(serializer.all(query)), repeat)
+        click.echo(f'{name:20} {count:7d} {before:11.1f} {after:11.1f} {before / after:7.2f}x')
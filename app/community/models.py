@@ -1,5 +1,5 @@
 # app/community/models.py
-from app.db import db
+from app.db import db, upsert_increment
 from datetime import datetime
 
 class Community(db.Model):
@@ -22,14 +22,16 @@ class CommunityMembership(db.Model):
     __tablename__ = 'community_memberships'
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True)
-    community_id = db.Column(db.Integer, db.ForeignKey('communities.id'), nullable=False, unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    community_id = db.Column(db.Integer, db.ForeignKey('communities.id'), nullable=False)
     role = db.Column(db.String(50), default='member')  # owner, admin, member
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relationship to user
     user = db.relationship('User', backref='community_memberships')
 
+    __table_args__ = (db.UniqueConstraint('user_id', 'community_id', name='unique_user_community'),)
+
 
 class CommunityMessage(db.Model):
     __tablename__ = 'community_messages'
@@ -43,6 +45,10 @@ class CommunityMessage(db.Model):
     # Relationship to sender
     sender = db.relationship('User', backref='community_messages')
 
+    __table_args__ = (
+        db.Index('ix_community_messages_community_created', 'community_id', 'created_at'),
+    )
+
 
 class DirectMessage(db.Model):
     __tablename__ = 'direct_messages'
@@ -58,6 +64,117 @@ class DirectMessage(db.Model):
     sender = db.relationship('User', foreign_keys=[sender_id], backref='sent_messages')
     recipient = db.relationship('User', foreign_keys=[recipient_id], backref='received_messages')
 
+    __table_args__ = (
+        db.Index('ix_direct_messages_recipient_created', 'recipient_id', 'created_at'),
+        # Pages one conversation: (a -> b) and (b -> a) are each an index range
+        db.Index('ix_direct_messages_pair_created', 'sender_id', 'recipient_id', 'created_at'),
+        # Unread lookups only touch the (usually small) unread slice
+        db.Index('ix_direct_messages_recipient_unread', 'recipient_id',
+                 postgresql_where=db.text('is_read = false'),
+                 sqlite_where=db.text('is_read = 0')),
+    )
+
+
+class DMThread(db.Model):
+    """One row per conversation, keyed on the ordered (low id, high id) user pair.
+
+    Holds the latest message and each side's unread count so the
+    conversations screen is a single indexed read.
+    """
+    __tablename__ = 'dm_threads'
+
+    user_low_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    user_high_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    last_message_id = db.Column(db.Integer, db.ForeignKey('direct_messages.id'), nullable=False)
+    last_at = db.Column(db.DateTime, nullable=False)
+    unread_low = db.Column(db.Integer, nullable=False, default=0)  # unread by user_low
+    unread_high = db.Column(db.Integer, nullable=False, default=0)  # unread by user_high
+
+    last_message = db.relationship('DirectMessage')
+
+    __table_args__ = (
+        db.Index('ix_dm_threads_low_last', 'user_low_id', 'last_at'),
+        db.Index('ix_dm_threads_high_last', 'user_high_id', 'last_at'),
+    )
+
+    @staticmethod
+    def pair(a, b):
+        return (a, b) if a < b else (b, a)
+
+    @classmethod
+    def for_user(cls, user_id):
+        return cls.query.filter((cls.user_low_id == user_id) | (cls.user_high_id == user_id))
+
+    @classmethod
+    def record(cls, dm):
+        """Point the thread at `dm` (already flushed) unless it already points at a
+        later message, and bump the recipient's unread count."""
+        low, high = cls.pair(dm.sender_id, dm.recipient_id)
+        upsert_increment(cls, [{
+            'user_low_id': low,
+            'user_high_id': high,
+            'last_message_id': dm.id,
+            'last_at': dm.created_at,
+            'unread_low': 1 if dm.recipient_id == low else 0,
+            'unread_high': 1 if dm.recipient_id == high else 0,
+        }], ('user_low_id', 'user_high_id'), ('unread_low', 'unread_high'),
+            replace=('last_message_id', 'last_at'), newest='last_message_id')
+
+    @classmethod
+    def mark_read(cls, recipient_id, counts_by_sender):
+        """Take `counts_by_sender` {sender_id: n} off the recipient's side of each thread."""
+        for sender_id, n in counts_by_sender.items():
+            low, high = cls.pair(sender_id, recipient_id)
+            column = 'unread_low' if recipient_id == low else 'unread_high'
+            db.session.execute(
+                db.update(cls)
+                .where(cls.user_low_id == low, cls.user_high_id == high)
+                .values({column: getattr(cls, column) - n})
+            )
+
+    def to_dict(self, user_id):
+        is_low = user_id == self.user_low_id
+        message = self.last_message
+        return {
+            'peer_id': self.user_high_id if is_low else self.user_low_id,
+            'last_message_id': self.last_message_id,
+            'last_at': self.last_at,
+            'last_message': {
+                'sender_id': message.sender_id,
+                'content': message.content
+            } if message else None,
+            'unread_count': self.unread_low if is_low else self.unread_high
+        }
+
+
+class UnreadCounter(db.Model):
+    """Denormalized count of unread direct messages per recipient.
+
+    Adjusted in the same transaction as every DirectMessage insert or
+    read-state change, so it always matches `is_read = false` rows.
+    """
+    __tablename__ = 'dm_unread_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def increment(cls, user_id, n=1):
+        upsert_increment(cls, [{'user_id': user_id, 'unread_count': n}], ('user_id',), 'unread_count')
+
+    @classmethod
+    def decrement(cls, user_id, n):
+        if n:
+            db.session.execute(
+                db.update(cls).where(cls.user_id == user_id)
+                .values(unread_count=cls.unread_count - n)
+            )
+
+    @classmethod
+    def get_count(cls, user_id):
+        counter = db.session.get(cls, user_id)
+        return counter.unread_count if counter else 0
+
 
 class Connection(db.Model):
     __tablename__ = 'connections'
@@ -73,4 +190,8 @@ class Connection(db.Model):
     requester = db.relationship('User', foreign_keys=[requester_id], backref='sent_connections')
     addressee = db.relationship('User', foreign_keys=[addressee_id], backref='received_connections')
 
-    __table_args__ = (db.UniqueConstraint('requester_id', 'addressee_id', name='unique_connection'),)
\ No newline at end of file
+    __table_args__ = (
+        db.UniqueConstraint('requester_id', 'addressee_id', name='unique_connection'),
+        db.Index('ix_connections_requester_status', 'requester_id', 'status'),
+        db.Index('ix_connections_addressee_status', 'addressee_id', 'status'),
+    )
\ No newline at end of file
@@ -0,0 +1,80 @@
+# app/community/pubsub.py
+import queue
+import threading
+
+
+class Subscription:
+    """One listener's view of a channel: a bounded queue of published events."""
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def get(self, timeout=None):
+        """Next event, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LocalBroker:
+    """In-process pub/sub. Fan-out is a queue put per subscriber, no I/O.
+
+    Only reaches listeners in the same process; swap in a broker with the
+    same publish/subscribe/unsubscribe methods via `set_broker` to fan out
+    across workers.
+    """
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        sub = Subscription(self, channel, self.maxsize)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._channels.get(sub.channel)
+            if subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._channels[sub.channel]
+
+    def publish(self, channel, event):
+        with self._lock:
+            subs = list(self._channels.get(channel, ()))
+        for sub in subs:
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                # Slow consumer: stop feeding it; it resumes via Last-Event-ID.
+                sub.overflowed = True
+                self.unsubscribe(sub)
+
+
+broker = LocalBroker()
+
+
+def get_broker():
+    return broker
+
+
+def set_broker(new_broker):
+    global broker
+    broker = new_broker
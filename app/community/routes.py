@@ -1,41 +1,125 @@
 # app/community/routes.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, g
 from app.db import db
 from datetime import datetime
+from collections import Counter
+from sqlalchemy.orm import joinedload
 from app.community.models import (
     Community, CommunityMembership, CommunityMessage,
-    DirectMessage, Connection
+    DirectMessage, Connection, UnreadCounter, DMThread
 )
-from app.auth.models import User
+from app.auth.cache import user_cache
+from app.auth.identity import identity_required
+from app.streaming import wants_ndjson, ndjson_response
+from app.serializers import RowSerializer
+from app.community.pubsub import get_broker
+from app.pagination import keyset_page, get_limit, InvalidCursor
+from app.conditional import conditional, version_of
+from app.jobs.queue import enqueue
 
 community_bp = Blueprint('community', __name__, url_prefix='/community')
 
+# Seconds between SSE keep-alive comments on an idle stream
+STREAM_KEEPALIVE = 15
+# Most message ids accepted by one bulk mark-read call
+MAX_MARK_READ_IDS = 1000
 
-# Helper: Convert model to dict
-def to_dict(obj):
-    return {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
+
+# User relationships each model can inline via ?expand=
+EXPANDABLE = {
+    Community: ('owner',),
+    CommunityMessage: ('sender',),
+    DirectMessage: ('sender', 'recipient'),
+    Connection: ('requester', 'addressee'),
+}
+
+
+class InvalidExpand(ValueError):
+    pass
+
+
+@community_bp.errorhandler(InvalidExpand)
+@community_bp.errorhandler(InvalidCursor)
+def bad_request(e):
+    return jsonify({'error': str(e)}), 400
+
+
+# Helper: A 403 response unless the <user_id> in the path is the caller, else None
+def not_caller(user_id):
+    if user_id != g.identity.id:
+        return jsonify({'error': 'You can only access your own messages'}), 403
+    return None
+
+
+# Helper: Public fields of a user, safe to embed in other payloads
+def user_summary(user):
+    if user is None:
+        return None
+    return {
+        'id': user.id,
+        'username': user.username,
+        'role': user.role,
+        'profile_image': user.profile_image
+    }
+
+
+# Helper: Convert model to dict, inlining any expanded user relationships
+def to_dict(obj, expand=()):
+    data = {c.name: getattr(obj, c.name) for c in obj.__table__.columns}
+    for name in expand:
+        data[name] = user_summary(getattr(obj, name))
+    return data
+
+
+# Helper: Read ?expand= for `model` and eager-load those relationships on `query`
+# so an expanded page costs one query instead of one per row.
+def with_expand(query, model):
+    requested = [n.strip() for n in request.args.get('expand', '').split(',') if n.strip()]
+    allowed = EXPANDABLE[model]
+    unknown = [n for n in requested if n not in allowed]
+    if unknown:
+        raise InvalidExpand(f"Cannot expand {', '.join(unknown)}; allowed: {', '.join(allowed)}")
+
+    expand = tuple(dict.fromkeys(requested))
+    query = query.options(*[joinedload(getattr(model, name)) for name in expand])
+    return query, expand
+
+
+ROW_SERIALIZERS = {model: RowSerializer.for_model(model) for model in EXPANDABLE}
+
+
+# Helper: Pick how to serialize a list page. Un-expanded pages select plain
+# column tuples; expanded pages need the ORM objects and their relationships.
+def serializer_for(query, model, expand):
+    if expand:
+        return query, lambda obj: to_dict(obj, expand)
+    serializer = ROW_SERIALIZERS[model]
+    return serializer.select(query), serializer.row
 
 
 # 1. List Communities
 @community_bp.route('/', methods=['GET'])
+@conditional(lambda: version_of(Community.query, Community.id, Community.created_at))
 def list_communities():
-    communities = Community.query.order_by(Community.created_at.desc()).all()
-    return jsonify([to_dict(c) for c in communities])
+    query, expand = with_expand(Community.query.order_by(Community.created_at.desc()), Community)
+    query, serialize = serializer_for(query, Community, expand)
+    return jsonify([serialize(c) for c in query.all()])
 
 
 # 2. Create Community
 @community_bp.route('/create', methods=['POST'])
+@identity_required
 def create_community():
     data = request.get_json() or {}
     name = data.get('name')
-    owner_id = data.get('owner_id')
+    owner_id = g.identity.id
     description = data.get('description')
     is_private = data.get('is_private', False)
 
-    if not name or not owner_id:
-        return jsonify({'error': 'name and owner_id required'}), 400
+    if not name:
+        return jsonify({'error': 'name required'}), 400
 
-    if not User.query.get(owner_id):
+    if not user_cache.exists(owner_id):
         return jsonify({'error': 'Owner not found'}), 404
 
     if Community.query.filter_by(name=name).first():
@@ -64,12 +148,9 @@ def create_community():
 
 # 3. Join Community
 @community_bp.route('/<int:community_id>/join', methods=['POST'])
+@identity_required
 def join_community(community_id):
-    data = request.get_json() 
-    user_id = data.get('user_id')
-
-    if not user_id:
-        return jsonify({'error': 'user_id required'}), 400
+    user_id = g.identity.id
 
     community = Community.query.get(community_id)
     if not community:
@@ -90,12 +171,9 @@ def join_community(community_id):
 
 # 4. Leave Community
 @community_bp.route('/<int:community_id>/leave', methods=['POST'])
+@identity_required
 def leave_community(community_id):
-    data = request.get_json() or {}
-    user_id = data.get('user_id')
-
-    if not user_id:
-        return jsonify({'error': 'user_id required'}), 400
+    user_id = g.identity.id
 
     membership = CommunityMembership.query.filter_by(
         user_id=user_id, community_id=community_id
@@ -113,29 +191,49 @@ def leave_community(community_id):
     return jsonify({'message': 'Left community'}), 200
 
 
-# 5. Get Messages
+def community_channel(community_id):
+    return f'community:{community_id}'
+
+
+# 5. Get Messages (pass ?after_id= to fetch only messages newer than one you have)
 @community_bp.route('/<int:community_id>/messages', methods=['GET'])
 def get_messages(community_id):
     if not Community.query.get(community_id):
         return jsonify({'error': 'Community not found'}), 404
 
-    messages = CommunityMessage.query.filter_by(community_id=community_id)\
-        .order_by(CommunityMessage.created_at.asc()).all()
+    query = CommunityMessage.query.filter_by(community_id=community_id)
+    after_id = request.args.get('after_id', type=int)
+    if after_id is not None:
+        query = query.filter(CommunityMessage.id > after_id)
 
-    return jsonify([to_dict(m) for m in messages])
+    query, expand = with_expand(
+        query.order_by(CommunityMessage.created_at.asc(), CommunityMessage.id.asc()),
+        CommunityMessage
+    )
+    query, serialize = serializer_for(query, CommunityMessage, expand)
+
+    if wants_ndjson():
+        return ndjson_response(query, serialize)
+
+    return jsonify([serialize(m) for m in query.all()])
 
 
 # 6. Post Message
 @community_bp.route('/<int:community_id>/message', methods=['POST'])
+@identity_required
 def post_message(community_id):
     data = request.get_json() or {}
-    user_id = data.get('user_id')
+    user_id = g.identity.id
     content = data.get('content')
 
-    if not user_id or not content:
-        return jsonify({'error': 'user_id and content required'}), 400
+    if not content:
+        return jsonify({'error': 'content required'}), 400
 
-    if not CommunityMembership.query.filter_by(user_id=user_id, community_id=community_id).first():
+    # The token's membership claim may predate a leave, so ask the database
+    # (one lookup on the unique_user_community index)
+    if not db.session.query(
+        CommunityMembership.query.filter_by(user_id=user_id, community_id=community_id).exists()
+    ).scalar():
         return jsonify({'error': 'Not a member'}), 403
 
     message = CommunityMessage(
@@ -146,24 +244,82 @@ def post_message(community_id):
     db.session.add(message)
     db.session.commit()
 
-    return jsonify(to_dict(message)), 201
+    payload = to_dict(message)
+    get_broker().publish(
+        community_channel(community_id),
+        (message.id, current_app.json.dumps(payload))
+    )
+
+    return jsonify(payload), 201
+
+
+# 6b. Stream new messages as Server-Sent Events
+@community_bp.route('/<int:community_id>/stream', methods=['GET'])
+def stream_messages(community_id):
+    if not Community.query.get(community_id):
+        return jsonify({'error': 'Community not found'}), 404
+
+    # Resume point: the browser's Last-Event-ID on reconnect, else ?after_id=
+    after_id = request.headers.get('Last-Event-ID', type=int)
+    if after_id is None:
+        after_id = request.args.get('after_id', type=int)
+
+    # Subscribe before reading the backlog so nothing posted in between is lost
+    subscription = get_broker().subscribe(community_channel(community_id))
+
+    backlog = []
+    if after_id is not None:
+        serializer = ROW_SERIALIZERS[CommunityMessage]
+        rows = serializer.select(CommunityMessage.query).filter(
+            CommunityMessage.community_id == community_id,
+            CommunityMessage.id > after_id
+        ).order_by(CommunityMessage.id.asc())
+        dumps = current_app.json.dumps
+        backlog = [(row.id, dumps(serializer.row(row))) for row in rows]
+
+    # Give the connection back to the pool; an open stream costs no queries
+    db.session.close()
+
+    def generate():
+        last_id = after_id or 0
+        with subscription:
+            for message_id, data in backlog:
+                last_id = message_id
+                yield f'id: {message_id}\nevent: message\ndata: {data}\n\n'
+
+            while not subscription.overflowed:
+                event = subscription.get(timeout=STREAM_KEEPALIVE)
+                if event is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                message_id, data = event
+                if message_id <= last_id:
+                    continue
+                last_id = message_id
+                yield f'id: {message_id}\nevent: message\ndata: {data}\n\n'
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 
 # 7. Send Direct Message
 @community_bp.route('/message/direct', methods=['POST'])
+@identity_required
 def send_direct_message():
     data = request.get_json() or {}
-    sender_id = data.get('sender_id')
+    sender_id = g.identity.id
     recipient_id = data.get('recipient_id')
     content = data.get('content')
 
-    if not all([sender_id, recipient_id, content]):
-        return jsonify({'error': 'sender_id, recipient_id, content required'}), 400
+    if not all([recipient_id, content]):
+        return jsonify({'error': 'recipient_id, content required'}), 400
 
     if sender_id == recipient_id:
         return jsonify({'error': 'Cannot send message to yourself'}), 400
 
-    if not User.query.get(sender_id) or not User.query.get(recipient_id):
+    if not user_cache.exists(sender_id) or not user_cache.exists(recipient_id):
         return jsonify({'error': 'User not found'}), 404
 
     dm = DirectMessage(
@@ -172,56 +328,126 @@ def send_direct_message():
         content=content
     )
     db.session.add(dm)
+    db.session.flush()  # populate id/created_at for the thread row
+    DMThread.record(dm)
+    UnreadCounter.increment(recipient_id)
+    enqueue('direct_message_email', {'message_id': dm.id}, key=f'direct-message:{dm.id}',
+            delay=current_app.config['DM_EMAIL_DELAY_SECONDS'])
     db.session.commit()
 
     return jsonify(to_dict(dm)), 201
 
 
 # 8. Get Inbox
+# Marking messages read changes no timestamp, so the read count is part of the version
 @community_bp.route('/messages/inbox/<int:user_id>', methods=['GET'])
+@conditional(lambda user_id: version_of(
+    DirectMessage.query.filter_by(recipient_id=user_id), DirectMessage.id, DirectMessage.created_at,
+    extra=(db.func.count().filter(DirectMessage.is_read == True),)
+))
 def get_inbox(user_id):
-    if not User.query.get(user_id):
+    if not user_cache.exists(user_id):
         return jsonify({'error': 'User not found'}), 404
 
-    messages = DirectMessage.query.filter_by(recipient_id=user_id)\
-        .order_by(DirectMessage.created_at.desc()).all()
+    query, expand = with_expand(
+        DirectMessage.query.filter_by(recipient_id=user_id)
+        .order_by(DirectMessage.created_at.desc()),
+        DirectMessage
+    )
+    query, serialize = serializer_for(query, DirectMessage, expand)
+
+    if wants_ndjson():
+        return ndjson_response(query, serialize)
+
+    return jsonify([serialize(m) for m in query.all()])
 
-    return jsonify([to_dict(m) for m in messages])
+
+# Helper: Mark the user's unread messages matching `criteria` as read in one
+# UPDATE and take the same numbers off their unread counter and threads.
+# Returns the count.
+def mark_read(user_id, *criteria):
+    sender_ids = db.session.execute(
+        db.update(DirectMessage)
+        .where(DirectMessage.recipient_id == user_id, DirectMessage.is_read == False, *criteria)
+        .values(is_read=True)
+        .returning(DirectMessage.sender_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    UnreadCounter.decrement(user_id, len(sender_ids))
+    DMThread.mark_read(user_id, Counter(sender_ids))
+    return len(sender_ids)
 
 
 # 9. Mark Message as Read
 @community_bp.route('/message/<int:message_id>/read', methods=['POST'])
+@identity_required
 def mark_message_read(message_id):
-    data = request.get_json() or {}
-    user_id = data.get('user_id')
+    user_id = g.identity.id
 
-    message = DirectMessage.query.get(message_id)
-    if not message:
-        return jsonify({'error': 'Message not found'}), 404
+    if not mark_read(user_id, DirectMessage.id == message_id):
+        # Nothing changed: work out why only on this slow path
+        message = DirectMessage.query.get(message_id)
+        if not message:
+            return jsonify({'error': 'Message not found'}), 404
 
-    if message.recipient_id != user_id:
-        return jsonify({'error': 'Not your message'}), 403
+        if message.recipient_id != user_id:
+            return jsonify({'error': 'Not your message'}), 403
 
-    message.is_read = True
     db.session.commit()
 
     return jsonify({'message': 'Marked as read'}), 200
 
 
+# 9b. Mark many of the caller's messages as read: {"message_ids": [...]} or {"up_to_id"}
+@community_bp.route('/messages/read', methods=['POST'])
+@identity_required
+def mark_messages_read():
+    data = request.get_json() or {}
+    user_id = g.identity.id
+    message_ids = data.get('message_ids')
+    up_to_id = data.get('up_to_id')
+
+    if message_ids is not None:
+        if not isinstance(message_ids, list) or not all(isinstance(i, int) for i in message_ids):
+            return jsonify({'error': 'message_ids must be a list of integers'}), 400
+        if len(message_ids) > MAX_MARK_READ_IDS:
+            return jsonify({'error': f'At most {MAX_MARK_READ_IDS} message_ids per call'}), 400
+        marked = mark_read(user_id, DirectMessage.id.in_(message_ids)) if message_ids else 0
+    elif isinstance(up_to_id, int):
+        marked = mark_read(user_id, DirectMessage.id <= up_to_id)
+    else:
+        return jsonify({'error': 'message_ids or up_to_id required'}), 400
+
+    db.session.commit()
+
+    return jsonify({'marked': marked, 'unread_count': UnreadCounter.get_count(user_id)}), 200
+
+
+# 9c. Unread direct message count (primary-key lookup on the counter row)
+@community_bp.route('/messages/unread-count/<int:user_id>', methods=['GET'])
+@identity_required
+def unread_count(user_id):
+    forbidden = not_caller(user_id)
+    if forbidden:
+        return forbidden
+    return jsonify({'user_id': user_id, 'unread_count': UnreadCounter.get_count(user_id)}), 200
+
+
 # 10. Connect Users
 @community_bp.route('/connect', methods=['POST'])
+@identity_required
 def connect_users():
     data = request.get_json() or {}
-    requester_id = data.get('requester_id')
+    requester_id = g.identity.id
     addressee_id = data.get('addressee_id')
 
-    if not requester_id or not addressee_id:
-        return jsonify({'error': 'Both IDs required'}), 400
+    if not addressee_id:
+        return jsonify({'error': 'addressee_id required'}), 400
 
     if requester_id == addressee_id:
         return jsonify({'error': 'Cannot connect to yourself'}), 400
 
-    if not User.query.get(requester_id) or not User.query.get(addressee_id):
+    if not user_cache.exists(requester_id) or not user_cache.exists(addressee_id):
         return jsonify({'error': 'User not found'}), 404
 
     # Check existing connection
@@ -234,6 +460,8 @@ def connect_users():
         if existing.status == 'pending' and existing.requester_id == addressee_id:
             existing.status = 'accepted'
             existing.accepted_at = datetime.utcnow()
+            enqueue('connection_accepted_email', {'connection_id': existing.id},
+                    key=f'connection-accepted:{existing.id}')
             db.session.commit()
             return jsonify({'message': 'Connection accepted!', 'connection': to_dict(existing)})
         return jsonify({'message': 'Connection exists', 'status': existing.status}), 200
@@ -246,14 +474,69 @@ def connect_users():
 
 
 # 11. List Connections
+def accepted_connections(user_id):
+    return Connection.query.filter(
+        ((Connection.requester_id == user_id) | (Connection.addressee_id == user_id)) &
+        (Connection.status == 'accepted')
+    )
+
+
 @community_bp.route('/connections/<int:user_id>', methods=['GET'])
+@conditional(lambda user_id: version_of(
+    accepted_connections(user_id), Connection.id, Connection.accepted_at
+))
 def list_connections(user_id):
-    if not User.query.get(user_id):
+    if not user_cache.exists(user_id):
         return jsonify({'error': 'User not found'}), 404
 
-    conns = Connection.query.filter(
-        ((Connection.requester_id == user_id) | (Connection.addressee_id == user_id)) &
-        (Connection.status == 'accepted')
-    ).all()
+    query, expand = with_expand(accepted_connections(user_id), Connection)
+    query, serialize = serializer_for(query, Connection, expand)
+
+    return jsonify([serialize(c) for c in query.all()])
+
+
+# 12. List conversations, most recent first (?cursor=&limit=)
+@community_bp.route('/threads/<int:user_id>', methods=['GET'])
+@identity_required
+def list_threads(user_id):
+    forbidden = not_caller(user_id)
+    if forbidden:
+        return forbidden
 
-    return jsonify([to_dict(c) for c in conns])
\ No newline at end of file
+    query = DMThread.for_user(user_id).options(joinedload(DMThread.last_message))
+    threads, next_cursor = keyset_page(
+        query, DMThread.last_at, DMThread.last_message_id,
+        cursor=request.args.get('cursor'),
+        limit=get_limit()
+    )
+    return jsonify({
+        'threads': [t.to_dict(user_id) for t in threads],
+        'next_cursor': next_cursor
+    })
+
+
+# 13. Page through one conversation, newest first (?cursor=&limit=)
+@community_bp.route('/threads/<int:user_id>/<int:peer_id>/messages', methods=['GET'])
+@identity_required
+def get_thread_messages(user_id, peer_id):
+    forbidden = not_caller(user_id)
+    if forbidden:
+        return forbidden
+
+    if not db.session.get(DMThread, DMThread.pair(user_id, peer_id)):
+        return jsonify({'error': 'Conversation not found'}), 404
+
+    serializer = ROW_SERIALIZERS[DirectMessage]
+    query = serializer.select(DirectMessage.query).filter(
+        ((DirectMessage.sender_id == user_id) & (DirectMessage.recipient_id == peer_id)) |
+        ((DirectMessage.sender_id == peer_id) & (DirectMessage.recipient_id == user_id))
+    )
+    messages, next_cursor = keyset_page(
+        query, DirectMessage.created_at, DirectMessage.id,
+        cursor=request.args.get('cursor'),
+        limit=get_limit()
+    )
+    return jsonify({
+        'messages': serializer.rows(messages),
+        'next_cursor': next_cursor
+    })
@@ -1,17 +1,142 @@
 # app/config.py
 from dotenv import load_dotenv
+from datetime import timedelta
 import os
 
+from app.instrumentation import TimedQueuePool
+
 load_dotenv()
 
 
+def env_bool(name, default=False):
+    return os.getenv(name, str(default)).lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_seconds(name, default):
+    """A timedelta from an env var given in seconds; 'false' means never expire."""
+    value = os.getenv(name)
+    if value is None:
+        return timedelta(seconds=default)
+    if value.lower() == 'false':
+        return False
+    return timedelta(seconds=int(value))
+
+
+def engine_options(uri):
+    """Build SQLALCHEMY_ENGINE_OPTIONS for `uri` from DB_* env vars.
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE and
+    DB_POOL_PRE_PING tune the connection pool. DB_PGBOUNCER=true disables
+    psycopg's prepared statements, which transaction-mode PgBouncer cannot
+    route. DB_STATEMENT_TIMEOUT_MS is applied per connection by create_app
+    (see init_statement_timeout), not through connect_args.
+    """
+    if not uri or uri.startswith('sqlite'):
+        # SQLite picks its own pool class; queue-pool options don't apply.
+        return {}
+
+    options = {
+        # QueuePool subclass that records checkout waits (see app/instrumentation.py)
+        'poolclass': TimedQueuePool,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': env_bool('DB_POOL_PRE_PING', True),
+    }
+
+    if env_bool('DB_PGBOUNCER'):
+        options['connect_args'] = {'prepare_threshold': None}
+
+    return options
+
+
 class Config:
     # General Flask settings
     SECRET_KEY = os.getenv('SECRET_KEY')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
-    SQLALCHEMY_TRACK_MODIFICATIONS =  True
+    SQLALCHEMY_TRACK_MODIFICATIONS = env_bool('SQLALCHEMY_TRACK_MODIFICATIONS', False)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    # Postgres statement timeout in milliseconds, SET on each new connection.
+    # Behind transaction-mode PgBouncer a session SET doesn't follow the
+    # client, so set it on the server instead (ALTER ROLE ... SET
+    # statement_timeout) and leave this unset.
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0)) or None
+    DB_PGBOUNCER = env_bool('DB_PGBOUNCER')
+    # Web workers skip CLI-only imports (Flask-Migrate/Alembic, bench, jobs),
+    # which create_app wires up only under the `flask` CLI. The engine and DB
+    # driver are still set up by db.init_app at boot.
+    DEFER_IMPORTS = env_bool('DEFER_IMPORTS', True)
+
+    # Password hashing: scheme is scrypt | pbkdf2 | bcrypt, cost is scheme-specific
+    # (log2 N for scrypt, iterations for pbkdf2, log rounds for bcrypt).
+    PASSWORD_SCHEME = os.getenv('PASSWORD_SCHEME', 'scrypt').lower()
+    PASSWORD_HASH_COST = os.getenv('PASSWORD_HASH_COST')
+    # At most PASSWORD_HASH_WORKERS hashes run at once; other requests wait
+    # up to PASSWORD_HASH_TIMEOUT seconds for a turn, then get a 503.
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 5))
+
+    # In-process user lookup cache (see app/auth/cache.py)
+    USER_CACHE_BACKEND = os.getenv('USER_CACHE_BACKEND', 'memory').lower()  # memory | redis
+    USER_CACHE_REDIS_URL = os.getenv('USER_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 300))
+
+    # Write-behind mood logging (see app/mood/buffer.py)
+    MOOD_WRITE_BEHIND = env_bool('MOOD_WRITE_BEHIND', False)
+    MOOD_BUFFER_SIZE = int(os.getenv('MOOD_BUFFER_SIZE', 10000))
+    MOOD_FLUSH_BATCH = int(os.getenv('MOOD_FLUSH_BATCH', 500))
+    MOOD_FLUSH_INTERVAL = float(os.getenv('MOOD_FLUSH_INTERVAL', 1.0))
+    MOOD_ENQUEUE_TIMEOUT = float(os.getenv('MOOD_ENQUEUE_TIMEOUT', 0.05))
+    MOOD_SPILL_DIR = os.getenv('MOOD_SPILL_DIR')  # default: <instance path>/mood-spill
+    MOOD_SPILL_FSYNC = env_bool('MOOD_SPILL_FSYNC', False)
+
+    # Background jobs (see app/jobs), run by `flask jobs work`
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+    JOB_BACKOFF_SECONDS = float(os.getenv('JOB_BACKOFF_SECONDS', 10))
+    JOB_BACKOFF_MAX_SECONDS = float(os.getenv('JOB_BACKOFF_MAX_SECONDS', 3600))
+    # A running job whose worker went quiet this long is handed to another
+    JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', 300))
+    # Unread-message emails wait this long, so messages read in the app send none
+    DM_EMAIL_DELAY_SECONDS = int(os.getenv('DM_EMAIL_DELAY_SECONDS', 300))
+
+    # Outbound email (see app/jobs/mail.py): smtp | file
+    MAIL_BACKEND = os.getenv('MAIL_BACKEND', 'smtp').lower()
+    MAIL_SERVER = os.getenv('MAIL_SERVER', 'localhost')
+    MAIL_PORT = int(os.getenv('MAIL_PORT', 1025))  # `flask jobs smtp-sink`
+    MAIL_USE_TLS = env_bool('MAIL_USE_TLS', False)
+    MAIL_USERNAME = os.getenv('MAIL_USERNAME')
+    MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
+    MAIL_TIMEOUT = float(os.getenv('MAIL_TIMEOUT', 10))
+    MAIL_FROM = os.getenv('MAIL_FROM', 'EMAGE <no-reply@emage.app>')
+    MAIL_SINK_DIR = os.getenv('MAIL_SINK_DIR')  # default: <instance path>/mail-sink
+    PASSWORD_RESET_URL = os.getenv(
+        'PASSWORD_RESET_URL', 'https://emage-app.vercel.app/reset-password?token={token}'
+    )
+
+    # Batch admin actions (see app/auth/admin.py): ids per committed chunk,
+    # and the most ids one request may list (larger sets go by filter)
+    ADMIN_BATCH_CHUNK = int(os.getenv('ADMIN_BATCH_CHUNK', 1000))
+    ADMIN_BATCH_MAX_IDS = int(os.getenv('ADMIN_BATCH_MAX_IDS', 10000))
+
+    # Admin dashboard statistics cache
+    DASHBOARD_REFRESH_SECONDS = int(os.getenv('DASHBOARD_REFRESH_SECONDS', 60))
+
+    # Request instrumentation: GET /metrics (Prometheus text) and slow-request logging.
+    # /metrics is off unless enabled; with METRICS_TOKEN set, scrapers must
+    # send it as `Authorization: Bearer <token>`.
+    METRICS_ENABLED = env_bool('METRICS_ENABLED', False)
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    SLOW_REQUEST_SECONDS = float(os.getenv('SLOW_REQUEST_SECONDS', 1.0))
 
     # JWT settings
-    JWT_ACCESS_TOKEN_EXPIRES = os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 'False').lower() == 'true'
-    JWT_IDENTITY_CLAIM = os.getenv('JWT_IDENTITY_CLAIM')
\ No newline at end of file
+    JWT_ACCESS_TOKEN_EXPIRES = env_seconds('JWT_ACCESS_TOKEN_EXPIRES', 15 * 60)
+    JWT_REFRESH_TOKEN_EXPIRES = env_seconds('JWT_REFRESH_TOKEN_EXPIRES', 30 * 24 * 3600)
+    # 'sql' (shared revoked_tokens table) or 'memory' (per-process, for tests)
+    TOKEN_REVOCATION_STORE = os.getenv('TOKEN_REVOCATION_STORE', 'sql')
+    TOKEN_REVOCATION_SYNC_SECONDS = int(os.getenv('TOKEN_REVOCATION_SYNC_SECONDS', 5))
+    # Full rebuild of each worker's revocation filter, a backstop for the incremental sync
+    TOKEN_REVOCATION_RELOAD_SECONDS = int(os.getenv('TOKEN_REVOCATION_RELOAD_SECONDS', 300))
+    JWT_IDENTITY_CLAIM = os.getenv('JWT_IDENTITY_CLAIM', 'sub')
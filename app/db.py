@@ -1,11 +1,60 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_bcrypt import Bcrypt
+from sqlalchemy.dialects import postgresql, sqlite
 
 
 db = SQLAlchemy()
-migrate = Migrate()
 bcrypt = Bcrypt()
 jwt = JWTManager()
+
+
+def upsert_increment(model, rows, key_columns, counters, replace=(), newest=None):
+    """Insert `rows` into `model`, or add each row's `counters` values to the
+    existing row with the same `key_columns` and overwrite its `replace`
+    columns. With `newest`, `replace` columns are only overwritten when the
+    row's `newest` value is greater than the stored one, so concurrent
+    writers can't leave an older value behind. One statement on Postgres and
+    SQLite; runs in the caller's transaction.
+    """
+    if not rows:
+        return
+    if isinstance(counters, str):
+        counters = (counters,)
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(model).values(rows)
+        set_ = {c: getattr(model, c) + stmt.excluded[c] for c in counters}
+        if newest is None:
+            set_.update({c: stmt.excluded[c] for c in replace})
+        else:
+            is_newer = stmt.excluded[newest] > getattr(model, newest)
+            set_.update({c: db.case((is_newer, stmt.excluded[c]), else_=getattr(model, c)) for c in replace})
+        stmt = stmt.on_conflict_do_update(index_elements=list(key_columns), set_=set_)
+        db.session.execute(stmt)
+        return
+
+    for row in rows:
+        existing = db.session.get(model, tuple(row[k] for k in key_columns))
+        if existing:
+            for c in counters:
+                setattr(existing, c, getattr(existing, c) + row[c])
+            if newest is None or row[newest] > getattr(existing, newest):
+                for c in replace:
+                    setattr(existing, c, row[c])
+        else:
+            db.session.add(model(**row))
+
+
+def insert_ignore(model, key_columns):
+    """An INSERT for `model` that skips rows conflicting on `key_columns`
+    (ON CONFLICT DO NOTHING on Postgres and SQLite, a plain INSERT elsewhere).
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        return insert(model).on_conflict_do_nothing(index_elements=list(key_columns))
+    return db.insert(model)
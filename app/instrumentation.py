@@ -0,0 +1,228 @@
+# app/instrumentation.py
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+
+class LatencyWindow:
+    """The durations of the most recent requests, for percentile reporting."""
+
+    def __init__(self, size=2048):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        self._samples.append(seconds)
+
+    def percentiles(self, *points):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {f'p{p}': None for p in points}
+        last = len(samples) - 1
+        return {f'p{p}': samples[min(last, int(round(p / 100 * last)))] for p in points}
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in items:
+            lines.append(f'{self.name}{_labels(self.labels, label_values)} {value}')
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram; one bisect and a few increments per observation."""
+
+    def __init__(self, name, help, buckets, labels=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, label_values=()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # per-bucket counts (last is +Inf), then sum
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series[:-1]):
+                cumulative += count
+                labels = _labels(self.labels + ('le',), label_values + (str(bound),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {series[-1]}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(n, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+        for n, v in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+request_latency = LatencyWindow()
+
+REQUESTS = Counter('http_requests_total', 'HTTP requests by endpoint, method and status.',
+                   ('endpoint', 'method', 'status'))
+LATENCY = Histogram('http_request_duration_seconds', 'Request latency by endpoint.',
+                    LATENCY_BUCKETS, ('endpoint',))
+SQL_STATEMENTS = Histogram('http_request_sql_statements', 'SQL statements issued per request.',
+                           SQL_COUNT_BUCKETS, ('endpoint',))
+SQL_SECONDS = Histogram('http_request_sql_seconds', 'Time spent in SQL per request.',
+                        LATENCY_BUCKETS, ('endpoint',))
+RESPONSE_SIZE = Histogram('http_response_size_bytes', 'Response body size by endpoint.',
+                          SIZE_BUCKETS, ('endpoint',))
+POOL_WAIT = Histogram('db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection.',
+                      WAIT_BUCKETS)
+
+METRICS = (REQUESTS, LATENCY, SQL_STATEMENTS, SQL_SECONDS, RESPONSE_SIZE, POOL_WAIT)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    if has_request_context():
+        g._sql_count = g.get('_sql_count', 0) + 1
+        g._sql_seconds = g.get('_sql_seconds', 0.0) + (time.perf_counter() - started)
+
+
+def init_instrumentation(app):
+    # On the Engine class so the app's engine needn't exist yet
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def _start_timer():
+        g._request_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('_request_started', None)
+        if started is None:
+            return response
+
+        elapsed = time.perf_counter() - started
+        endpoint = (request.endpoint or 'unmatched',)
+        sql_count = g.pop('_sql_count', 0)
+        sql_seconds = g.pop('_sql_seconds', 0.0)
+
+        request_latency.add(elapsed)
+        REQUESTS.inc(endpoint + (request.method, str(response.status_code)))
+        LATENCY.observe(elapsed, endpoint)
+        SQL_STATEMENTS.observe(sql_count, endpoint)
+        SQL_SECONDS.observe(sql_seconds, endpoint)
+        if not response.is_streamed and response.content_length is not None:
+            RESPONSE_SIZE.observe(response.content_length, endpoint)
+
+        threshold = current_app.config['SLOW_REQUEST_SECONDS']
+        if threshold and elapsed >= threshold:
+            current_app.logger.warning(
+                'Slow request: %s %s -> %s in %.3fs (%d SQL statements, %.3fs in SQL)',
+                request.method, request.path, response.status_code,
+                elapsed, sql_count, sql_seconds
+            )
+        return response
+
+    if app.config['METRICS_ENABLED']:
+        app.add_url_rule('/metrics', 'metrics', metrics)
+
+
+def metrics():
+    """Prometheus text exposition of everything recorded in this process."""
+    from app.db import db
+    from app.auth.cache import user_cache
+
+    token = current_app.config['METRICS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return Response('Unauthorized\n', status=401, mimetype='text/plain',
+                        headers={'WWW-Authenticate': 'Bearer'})
+
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+
+    pool = pool_usage(db.engine)
+    for key in ('size', 'checked_out', 'idle', 'overflow'):
+        if key in pool:
+            lines.append(f'# TYPE db_pool_{key} gauge')
+            lines.append(f'db_pool_{key} {pool[key]}')
+
+    stats = user_cache.stats()
+    lines.append('# TYPE user_cache_hits_total counter')
+    lines.append(f"user_cache_hits_total {stats['hits']}")
+    lines.append('# TYPE user_cache_misses_total counter')
+    lines.append(f"user_cache_misses_total {stats['misses']}")
+
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+def pool_usage(engine):
+    """Checked-out / idle / overflow connections for a QueuePool engine."""
+    pool = engine.pool
+    if not hasattr(pool, 'checkedout'):
+        return {'pool': type(pool).__name__}
+    return {
+        'pool': type(pool).__name__,
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'idle': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0)
+    }
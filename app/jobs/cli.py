@@ -0,0 +1,80 @@
+# app/jobs/cli.py
+import signal
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.db import db
+from app.jobs import tasks  # registers the handlers
+from app.jobs.mail import SmtpSink, sink_dir
+from app.jobs.models import Job
+from app.jobs.queue import work as run_worker
+
+jobs = AppGroup('jobs', help='Background job queue.')
+
+
+@jobs.command('work')
+@click.option('--batch', default=10, show_default=True, help='Jobs claimed per query.')
+@click.option('--poll', default=1.0, show_default=True, help='Seconds to sleep when idle.')
+@click.option('--once', is_flag=True, help='Exit once no job is due.')
+def work(batch, poll, once):
+    """Run jobs until stopped (SIGINT/SIGTERM finish the current batch)."""
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+        click.echo('Stopping after the current batch...')
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    succeeded, failed = run_worker(batch=batch, poll=poll, once=once, should_stop=lambda: stopping)
+    click.echo(f'{succeeded} jobs done, {failed} failed')
+
+
+@jobs.command('stats')
+def stats():
+    """Job counts by kind and status."""
+    rows = db.session.query(Job.kind, Job.status, db.func.count())\
+        .group_by(Job.kind, Job.status).order_by(Job.kind, Job.status).all()
+    for kind, status, count in rows:
+        click.echo(f'{kind:<30} {status:<10} {count}')
+    if not rows:
+        click.echo('No jobs')
+
+
+@jobs.command('retry')
+@click.option('--kind', help='Only jobs of this kind.')
+def retry(kind):
+    """Requeue failed jobs with a fresh set of attempts."""
+    query = db.update(Job).where(Job.status == 'failed')
+    if kind:
+        query = query.where(Job.kind == kind)
+    result = db.session.execute(
+        query.values(status='pending', attempts=0, run_at=datetime.utcnow(), finished_at=None)
+    )
+    db.session.commit()
+    click.echo(f'Requeued {result.rowcount} jobs')
+
+
+@jobs.command('purge')
+@click.option('--days', default=7, show_default=True, help='Keep finished jobs this many days.')
+def purge(days):
+    """Delete done jobs (and their idempotency keys) older than --days."""
+    result = db.session.execute(
+        db.delete(Job).where(Job.status == 'done',
+                             Job.finished_at < datetime.utcnow() - timedelta(days=days))
+    )
+    db.session.commit()
+    click.echo(f'Deleted {result.rowcount} jobs')
+
+
+@jobs.command('smtp-sink')
+@click.option('--host', default='localhost', show_default=True)
+@click.option('--port', default=1025, show_default=True)
+def smtp_sink(host, port):
+    """Local SMTP server that saves every message to MAIL_SINK_DIR."""
+    directory = sink_dir(current_app)
+    click.echo(f'Accepting mail on {host}:{port}, saving to {directory}')
+    SmtpSink(directory, on_message=lambda name: click.echo(f'Received {name}')).serve(host, port)
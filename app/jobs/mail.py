@@ -0,0 +1,93 @@
+# app/jobs/mail.py
+"""Outbound email, sent only from jobs so no request waits on SMTP.
+
+MAIL_BACKEND=smtp delivers to MAIL_SERVER:MAIL_PORT. By default that is
+localhost:1025, where `flask jobs smtp-sink` listens in development.
+MAIL_BACKEND=file skips the network and writes each message to
+MAIL_SINK_DIR.
+"""
+import asyncio
+import os
+import smtplib
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import make_msgid
+
+from flask import current_app
+
+
+def sink_dir(app):
+    return app.config['MAIL_SINK_DIR'] or os.path.join(app.instance_path, 'mail-sink')
+
+
+def _write_eml(directory, data):
+    os.makedirs(directory, exist_ok=True)
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S.%f}-{os.getpid()}.eml"
+    with open(os.path.join(directory, name), 'wb') as f:
+        f.write(data)
+    return name
+
+
+def send_mail(to, subject, body):
+    config = current_app.config
+    message = EmailMessage()
+    message['From'] = config['MAIL_FROM']
+    message['To'] = to
+    message['Subject'] = subject
+    message['Message-ID'] = make_msgid()
+    message.set_content(body)
+
+    if config['MAIL_BACKEND'] == 'file':
+        _write_eml(sink_dir(current_app), bytes(message))
+        return
+
+    with smtplib.SMTP(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=config['MAIL_TIMEOUT']) as smtp:
+        if config['MAIL_USE_TLS']:
+            smtp.starttls()
+        if config['MAIL_USERNAME']:
+            smtp.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+        smtp.send_message(message)
+
+
+class SmtpSink:
+    """A bare-bones SMTP server that accepts every message and saves it as an
+    .eml file. For local development only: no auth, no TLS, no relaying."""
+
+    def __init__(self, directory, on_message=None):
+        self.directory = directory
+        self.on_message = on_message
+
+    async def handle(self, reader, writer):
+        async def reply(line):
+            writer.write(f'{line}\r\n'.encode())
+            await writer.drain()
+
+        await reply('220 emage smtp-sink ready')
+        while line := await reader.readline():
+            command = line.decode('latin-1').strip().split(' ', 1)[0].upper()
+            if command in ('HELO', 'EHLO'):
+                await reply('250 smtp-sink')
+            elif command in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                await reply('250 OK')
+            elif command == 'DATA':
+                await reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while (line := await reader.readline()) not in (b'.\r\n', b'.\n', b''):
+                    lines.append(line[1:] if line.startswith(b'..') else line)  # dot-unstuffing
+                name = _write_eml(self.directory, b''.join(lines))
+                if self.on_message:
+                    self.on_message(name)
+                await reply('250 OK: queued')
+            elif command == 'QUIT':
+                await reply('221 Bye')
+                break
+            else:
+                await reply('502 Command not implemented')
+        writer.close()
+
+    def serve(self, host, port):
+        async def main():
+            server = await asyncio.start_server(self.handle, host, port)
+            async with server:
+                await server.serve_forever()
+        asyncio.run(main())
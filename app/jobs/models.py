@@ -0,0 +1,33 @@
+# app/jobs/models.py
+from datetime import datetime
+
+from app.db import db
+
+
+class Job(db.Model):
+    """Deferred work for `flask jobs work` (see app/jobs/queue.py).
+
+    status is pending -> running -> done, or back to pending with a later
+    run_at after a failure, until max_attempts is used up (failed).
+    """
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(80), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    # Enqueueing a key that already exists is a no-op
+    idempotency_key = db.Column(db.String(200), unique=True, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    locked_by = db.Column(db.String(100), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # The worker's claim query: due jobs, oldest first
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
@@ -0,0 +1,152 @@
+# app/jobs/queue.py
+"""A job queue in the `jobs` table.
+
+Request handlers call `enqueue()` inside their own transaction, so a job
+exists only if the change that caused it commits. `flask jobs work` claims
+due jobs, runs the handler registered for each `kind` with `@task`, and
+retries failures with exponential backoff.
+
+Delivery is at-least-once. A job whose worker dies is picked up again once
+its lease (JOB_LEASE_SECONDS) runs out, so handlers must tolerate running
+twice.
+"""
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.db import db, insert_ignore
+from app.jobs.models import Job
+
+# kind -> handler; filled by @task in app/jobs/tasks.py
+HANDLERS = {}
+
+
+def task(kind):
+    """Register `fn(**payload)` as the handler for jobs of `kind`."""
+    def decorator(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def enqueue(kind, payload=None, key=None, delay=0, max_attempts=None):
+    """Add a job to the current transaction. It becomes visible to workers on
+    commit. If a job with the same idempotency `key` exists, this does nothing.
+    """
+    db.session.execute(insert_ignore(Job, ('idempotency_key',)), [{
+        'kind': kind,
+        'payload': payload or {},
+        'idempotency_key': key,
+        'max_attempts': max_attempts or current_app.config['JOB_MAX_ATTEMPTS'],
+        'run_at': datetime.utcnow() + timedelta(seconds=delay),
+    }])
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number `attempts`: doubling from
+    JOB_BACKOFF_SECONDS up to JOB_BACKOFF_MAX_SECONDS, with jitter so failed
+    jobs don't all come back at once."""
+    config = current_app.config
+    delay = min(config['JOB_BACKOFF_MAX_SECONDS'], config['JOB_BACKOFF_SECONDS'] * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker, limit):
+    """Mark up to `limit` due jobs as running by `worker` and return them as
+    (id, kind, payload, attempts, max_attempts) rows.
+
+    Postgres skips rows other workers have locked. The UPDATE re-checks that
+    each job is still due, so concurrent workers on SQLite can't claim the
+    same job twice either.
+    """
+    now = datetime.utcnow()
+    lease = timedelta(seconds=current_app.config['JOB_LEASE_SECONDS'])
+    due = db.or_(
+        (Job.status == 'pending') & (Job.run_at <= now),
+        (Job.status == 'running') & (Job.locked_at < now - lease),
+    )
+    ids = db.session.scalars(
+        db.select(Job.id).where(due).order_by(Job.run_at).limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        db.session.rollback()
+        return []
+
+    claimed = db.session.execute(
+        db.update(Job).where(Job.id.in_(ids), due)
+        .values(status='running', locked_at=now, locked_by=worker, attempts=Job.attempts + 1)
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    return claimed
+
+
+def _finish(job_id, worker, **values):
+    # Only the worker holding the lease may settle the job
+    db.session.execute(
+        db.update(Job).where(Job.id == job_id, Job.locked_by == worker, Job.status == 'running')
+        .values(locked_at=None, locked_by=None, **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def run_job(job, worker):
+    """Run one claimed job and record the outcome. Returns True on success."""
+    job_id, kind, payload, attempts, max_attempts = job
+    handler = HANDLERS.get(kind)
+    try:
+        if handler is None:
+            attempts = max_attempts  # no point retrying
+            raise LookupError(f'No handler for job kind {kind!r}')
+        handler(**payload)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc(limit=5)
+        if attempts >= max_attempts:
+            current_app.logger.error('Job %s (%s) failed for good after %d attempts\n%s',
+                                     job_id, kind, attempts, error)
+            _finish(job_id, worker, status='failed', last_error=error, finished_at=datetime.utcnow())
+        else:
+            delay = backoff(attempts)
+            current_app.logger.warning('Job %s (%s) failed, retrying in %.0fs: %s',
+                                       job_id, kind, delay, error.strip().splitlines()[-1])
+            _finish(job_id, worker, status='pending', last_error=error,
+                    run_at=datetime.utcnow() + timedelta(seconds=delay))
+        return False
+
+    _finish(job_id, worker, status='done', last_error=None, finished_at=datetime.utcnow())
+    return True
+
+
+def work(batch=10, poll=1.0, once=False, should_stop=lambda: False):
+    """Claim and run jobs until `should_stop()`, sleeping `poll` seconds when
+    nothing is due. With `once`, stop when the queue is drained. Returns
+    (succeeded, failed) counts."""
+    worker = worker_name()
+    succeeded = failed = 0
+    while not should_stop():
+        jobs = claim(worker, batch)
+        if not jobs:
+            if once:
+                break
+            time.sleep(poll)
+            continue
+        for job in jobs:
+            if run_job(job, worker):
+                succeeded += 1
+            else:
+                failed += 1
+    return succeeded, failed
@@ -0,0 +1,68 @@
+# app/jobs/tasks.py
+"""Job handlers. Each re-reads current state, so a job that runs late or
+twice sends nothing stale."""
+from datetime import datetime
+
+from flask import current_app
+
+from app.db import db
+from app.auth.models import User
+from app.community.models import DirectMessage, Connection
+from app.jobs.mail import send_mail
+from app.jobs.queue import task
+
+
+@task('password_reset_email')
+def password_reset_email(user_id):
+    user = db.session.get(User, user_id)
+    if not user or not user.reset_token or user.reset_token_expires < datetime.utcnow():
+        return  # already used, replaced by a newer request's job, or expired
+
+    link = current_app.config['PASSWORD_RESET_URL'].format(token=user.reset_token)
+    send_mail(
+        user.email,
+        'Reset your EMAGE password',
+        f'Hi {user.username},\n\n'
+        f'Use this link within the hour to choose a new password:\n{link}\n\n'
+        f"If you didn't ask for this, you can ignore this email."
+    )
+
+
+@task('direct_message_email')
+def direct_message_email(message_id):
+    dm = db.session.get(DirectMessage, message_id)
+    if not dm or dm.is_read:
+        return
+
+    # One email per burst: a later unread message from the same sender has its own job
+    newer = db.session.query(
+        DirectMessage.query.filter(
+            DirectMessage.sender_id == dm.sender_id,
+            DirectMessage.recipient_id == dm.recipient_id,
+            DirectMessage.is_read == False,
+            DirectMessage.id > dm.id
+        ).exists()
+    ).scalar()
+    if newer:
+        return
+
+    send_mail(
+        dm.recipient.email,
+        f'New message from {dm.sender.username}',
+        f'Hi {dm.recipient.username},\n\n'
+        f'{dm.sender.username} sent you a message on EMAGE. Open the app to read it.'
+    )
+
+
+@task('connection_accepted_email')
+def connection_accepted_email(connection_id):
+    connection = db.session.get(Connection, connection_id)
+    if not connection or connection.status != 'accepted':
+        return
+
+    send_mail(
+        connection.requester.email,
+        f'{connection.addressee.username} accepted your connection request',
+        f'Hi {connection.requester.username},\n\n'
+        f'You and {connection.addressee.username} are now connected on EMAGE.'
+    )
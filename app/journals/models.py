@@ -1,5 +1,6 @@
 # app/models/journal.py
 from app.db import db
+from app.serializers import RowSerializer, day_label
 from datetime import datetime
 
 
@@ -17,6 +18,14 @@ class Journal(db.Model):
     # Relationship
     user = db.relationship('User', backref=db.backref('journals', lazy=True))
 
+    __table_args__ = (
+        # Backs keyset pagination on GET /journals (optionally scoped per user)
+        db.Index('ix_journal_entries_user_created_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_journal_entries_created_id', 'created_at', 'id'),
+        # MAX(updated_at) for the list ETag (see app/conditional.py)
+        db.Index('ix_journal_entries_updated', 'updated_at'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -24,6 +33,14 @@ class Journal(db.Model):
             'title': self.title,
             'content': self.content,
             'is_private': self.is_private,
-            'created_at': self.created_at.strftime("%a, %b %d, %Y"),
-            'updated_at': self.updated_at.strftime("%a, %b %d, %Y") if self.updated_at else None
-        }
\ No newline at end of file
+            'created_at': day_label(self.created_at),
+            'updated_at': day_label(self.updated_at)
+        }
+
+
+# Column-tuple equivalent of Journal.to_dict for list endpoints
+JOURNAL_SERIALIZER = RowSerializer(
+    [Journal.id, Journal.user_id, Journal.title, Journal.content,
+     Journal.is_private, Journal.created_at, Journal.updated_at],
+    {'created_at': day_label, 'updated_at': day_label}
+)
@@ -1,20 +1,83 @@
-from flask import request, jsonify
+from flask import request, jsonify, g
+import click
 from app.db import db
-from app.journals.models import Journal
+from app.journals.models import Journal, JOURNAL_SERIALIZER
+from app.journals.search import search_entries, rebuild_search_index, InvalidSearch
+from app.pagination import keyset_page, get_limit, InvalidCursor
+from app.streaming import wants_ndjson, ndjson_response
+from app.conditional import conditional, version_of
+from app.auth.identity import identity_required, optional_identity
 from flask import Blueprint
 
 journals_bp = Blueprint('journals', __name__, url_prefix="/journals")
 
 
-# Get all journal entries
+def journals_scope():
+    query = Journal.query
+    user_id = request.args.get('user_id', type=int)
+    if user_id is not None:
+        query = query.filter(Journal.user_id == user_id)
+    return query
+
+
+# Get journal entries, newest first, one page at a time.
+# Pass the returned `next_cursor` back as `?cursor=` to fetch the next page,
+# or ask for `?format=ndjson` to stream the full export instead.
 @journals_bp.route('/', methods=['GET'])
+@conditional(lambda: version_of(journals_scope(), Journal.id, Journal.created_at, Journal.updated_at))
 def get_entries():
-    entries = Journal.query.order_by(Journal.created_at.desc()).all()
-    return jsonify([entry.to_dict() for entry in entries]), 200
+    query = JOURNAL_SERIALIZER.select(journals_scope())
+
+    if wants_ndjson():
+        return ndjson_response(
+            query.order_by(Journal.created_at.desc(), Journal.id.desc()),
+            JOURNAL_SERIALIZER.row
+        )
+
+    try:
+        entries, next_cursor = keyset_page(
+            query, Journal.created_at, Journal.id,
+            cursor=request.args.get('cursor'),
+            limit=get_limit()
+        )
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
+
+    return jsonify({
+        'entries': JOURNAL_SERIALIZER.rows(entries),
+        'next_cursor': next_cursor
+    }), 200
+
+
+# Full-text search over titles and content, best match first. Private
+# entries are only visible to their owner (send the access token).
+# Page with `?offset=`; pass `?user_id=` to search one user's entries.
+@journals_bp.route('/search', methods=['GET'])
+def search():
+    identity = optional_identity()
+    limit = get_limit()
+    offset = max(request.args.get('offset', 0, type=int), 0)
+
+    try:
+        rows = search_entries(
+            request.args.get('q'),
+            viewer_id=identity.id if identity else None,
+            user_id=request.args.get('user_id', type=int),
+            limit=limit,
+            offset=offset
+        )
+    except InvalidSearch as e:
+        return jsonify({'message': str(e)}), 400
+
+    return jsonify({
+        'results': [{**JOURNAL_SERIALIZER.row(row), 'rank': row[-1]} for row in rows],
+        'next_offset': offset + limit if len(rows) == limit else None
+    }), 200
 
 
 # Create a new journal entry
 @journals_bp.route('/add_journal', methods=['POST'])
+@identity_required
 def create_entry():
     data = request.get_json() or {}
 
@@ -24,7 +87,7 @@ def create_entry():
 
     try:
         new_entry = Journal(
-            user_id=data.get('user_id', 1),  
+            user_id=g.identity.id,
             title=data['title'],
             content=data['content'],
             is_private=data.get('is_private', False)
@@ -84,4 +147,12 @@ def delete_entry(id):
         return jsonify({'message': 'Journal entry deleted successfully'}), 200
     except Exception as e:
         db.session.rollback()
-        return jsonify({'message': 'Error deleting journal entry', 'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'message': 'Error deleting journal entry', 'error': str(e)}), 500
+
+
+@journals_bp.cli.command('reindex-search')
+def reindex_search():
+    """Rebuild the journal full-text index (after bulk loads)."""
+    with db.engine.begin() as connection:
+        rebuild_search_index(connection)
+    click.echo('Journal search index rebuilt')
@@ -0,0 +1,183 @@
+# app/journals/search.py
+"""Full-text search over journal entries.
+
+Postgres keeps a weighted `search_vector` tsvector as a stored generated
+column with a GIN index, so the database updates it in the same write as
+the row. SQLite uses an external-content FTS5 table, `journal_entries_fts`,
+kept in step by the Journal mapper events below. Rows written with bulk
+Core statements bypass those events; run `flask journals reindex-search`
+afterwards, or call `unindex_entries` before a bulk DELETE.
+"""
+import re
+
+from sqlalchemy import event, inspect
+
+from app.db import db
+from app.journals.models import Journal, JOURNAL_SERIALIZER
+
+FTS_TABLE = 'journal_entries_fts'
+SEARCH_COLUMN = 'search_vector'
+SEARCH_INDEX = 'ix_journal_entries_search'
+MAX_QUERY_LENGTH = 200
+
+# Title matches count for more than body matches on both backends
+PG_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+FTS5_WEIGHTS = (10.0, 1.0)  # title, content
+
+
+class InvalidSearch(ValueError):
+    pass
+
+
+def create_search_index(connection):
+    """Create the search column/index or FTS table if missing. Idempotent."""
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql(
+            f'ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS {SEARCH_COLUMN} tsvector '
+            f'GENERATED ALWAYS AS ({PG_SEARCH_VECTOR}) STORED'
+        )
+        connection.exec_driver_sql(
+            f'CREATE INDEX IF NOT EXISTS {SEARCH_INDEX} ON journal_entries USING gin ({SEARCH_COLUMN})'
+        )
+    elif connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"title, content, content='journal_entries', content_rowid='id', "
+            f"tokenize='porter unicode61')"
+        )
+
+
+def rebuild_search_index(connection):
+    """Re-derive the whole index from journal_entries (after bulk loads)."""
+    create_search_index(connection)
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql(f'REINDEX INDEX {SEARCH_INDEX}')
+    elif connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+
+
+def unindex_entries(*criteria):
+    """Drop the entries matching `criteria` from the FTS5 index, ahead of a
+    bulk DELETE of those rows. Postgres needs nothing: its index goes with the row."""
+    if db.session.get_bind().dialect.name != 'sqlite':
+        return
+    fts = db.table(FTS_TABLE, db.column(FTS_TABLE), db.column('rowid'), db.column('title'), db.column('content'))
+    db.session.execute(fts.insert().from_select(
+        [FTS_TABLE, 'rowid', 'title', 'content'],
+        db.select(db.literal('delete'), Journal.id, Journal.title, Journal.content).where(*criteria)
+    ))
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Alembic autogenerate filter: the search structures live outside the models."""
+    if type_ == 'table' and name is not None and name.startswith(FTS_TABLE):
+        return False
+    if (type_ == 'column' and name == SEARCH_COLUMN) or (type_ == 'index' and name == SEARCH_INDEX):
+        return False
+    return True
+
+
+def _fts5_query(q):
+    """Quote each word so user input can't use (or break) FTS5 query syntax."""
+    terms = re.findall(r'\w+', q.lower())
+    if not terms:
+        raise InvalidSearch('q must contain at least one word')
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def search_entries(q, viewer_id=None, user_id=None, limit=20, offset=0):
+    """Rank entries matching `q`: public ones plus the viewer's own private ones.
+
+    Returns (JOURNAL_SERIALIZER columns..., rank) rows, best match first.
+    """
+    q = (q or '').strip()
+    if not q:
+        raise InvalidSearch('q is required')
+    if len(q) > MAX_QUERY_LENGTH:
+        raise InvalidSearch(f'q must be at most {MAX_QUERY_LENGTH} characters')
+
+    visible = Journal.is_private.isnot(True)
+    if viewer_id is not None:
+        visible = visible | (Journal.user_id == viewer_id)
+
+    if db.engine.dialect.name == 'postgresql':
+        tsquery = db.func.websearch_to_tsquery('english', q)
+        vector = db.literal_column(f'journal_entries.{SEARCH_COLUMN}')
+        rank = db.func.ts_rank_cd(vector, tsquery)
+        query = db.select(*JOURNAL_SERIALIZER.columns, rank.label('rank'))\
+            .where(vector.op('@@')(tsquery), visible)\
+            .order_by(rank.desc(), Journal.id.desc())
+    else:
+        fts = db.table(FTS_TABLE, db.column('rowid'))
+        # bm25() is lower-is-better; negate so both backends rank high-is-better
+        rank = -db.func.bm25(db.literal_column(FTS_TABLE), *FTS5_WEIGHTS)
+        query = db.select(*JOURNAL_SERIALIZER.columns, rank.label('rank'))\
+            .select_from(fts).join(Journal, Journal.id == fts.c.rowid)\
+            .where(db.literal_column(FTS_TABLE).op('MATCH')(_fts5_query(q)), visible)\
+            .order_by(rank.desc(), Journal.id.desc())
+
+    if user_id is not None:
+        query = query.where(Journal.user_id == user_id)
+
+    return db.session.execute(query.limit(limit).offset(offset)).all()
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _create_with_tables(target, connection, **kw):
+    # db.create_all() builds the search structures along with the tables
+    if 'journal_entries' in target.tables:
+        create_search_index(connection)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def _drop_with_tables(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+# FTS5 external-content maintenance (SQLite only). A 'delete' must pass the
+# values that were indexed, so updates remove the old text before adding the new.
+
+def _fts_delete(connection, row_id, title, content):
+    connection.exec_driver_sql(
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content) VALUES('delete', ?, ?, ?)",
+        (row_id, title, content)
+    )
+
+
+def _fts_insert(connection, row_id, title, content):
+    connection.exec_driver_sql(
+        f'INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (?, ?, ?)',
+        (row_id, title, content)
+    )
+
+
+@event.listens_for(Journal, 'after_insert')
+def _index_entry(mapper, connection, target):
+    if connection.dialect.name == 'sqlite':
+        _fts_insert(connection, target.id, target.title, target.content)
+
+
+@event.listens_for(Journal, 'after_update')
+def _reindex_entry(mapper, connection, target):
+    if connection.dialect.name != 'sqlite':
+        return
+    state = inspect(target)
+    title, content = state.attrs.title.history, state.attrs.content.history
+    if not (title.has_changes() or content.has_changes()):
+        return
+    _fts_delete(
+        connection, target.id,
+        title.deleted[0] if title.deleted else target.title,
+        content.deleted[0] if content.deleted else target.content
+    )
+    _fts_insert(connection, target.id, target.title, target.content)
+
+
+@event.listens_for(Journal, 'after_delete')
+def _unindex_entry(mapper, connection, target):
+    if connection.dialect.name == 'sqlite':
+        _fts_delete(connection, target.id, target.title, target.content)
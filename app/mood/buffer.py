@@ -0,0 +1,277 @@
+# app/mood/buffer.py
+"""Write-behind buffer for mood check-ins (MOOD_WRITE_BEHIND=true).
+
+`add_mood` hands each check-in to `mood_buffer.submit()` and answers 202
+with the mood's `ref`. A flusher thread bulk-inserts the queue every
+MOOD_FLUSH_BATCH entries or MOOD_FLUSH_INTERVAL seconds, whichever comes
+first.
+
+Every accepted entry is first appended to a spill file in MOOD_SPILL_DIR,
+uniquely named and locked while in use. After each flushed batch the file
+is truncated, or, if entries arrived meanwhile, replaced by a new file
+holding just those, so it never grows past the queue. A process that dies
+with entries queued leaves its file behind, unlocked; the next buffer to
+start claims every such file and writes those entries. Inserts skip refs
+already stored, so replaying entries that were partly flushed is harmless.
+Set MOOD_SPILL_FSYNC to also survive power loss, at the cost of an fsync
+per check-in.
+
+While the database is unreachable the queue is kept and retried. Rows the
+database rejects are isolated by splitting the batch, and each one that
+still fails on its own is appended to DEAD_LETTER_FILE instead.
+"""
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from app.db import db
+from app.auth.models import User
+from app.mood.models import Mood
+
+SPILL_PREFIX = 'moods-'
+STAGING_PREFIX = 'new-'  # a spill file being written, not yet claimable
+DEAD_LETTER_FILE = 'dead-letter.log'
+
+
+class BufferFull(Exception):
+    """The queue stayed full for longer than MOOD_ENQUEUE_TIMEOUT."""
+
+
+class MoodBuffer:
+
+    def __init__(self):
+        self.enabled = False
+        self._pending = deque()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._spill = None
+        self._spill_path = None
+        self.flushed = 0
+        self.rejected = 0
+        self.dead_lettered = 0
+
+    def init_app(self, app):
+        self.enabled = app.config['MOOD_WRITE_BEHIND']
+        if not self.enabled:
+            return
+        self.maxsize = app.config['MOOD_BUFFER_SIZE']
+        self.batch_size = app.config['MOOD_FLUSH_BATCH']
+        self.interval = app.config['MOOD_FLUSH_INTERVAL']
+        self.enqueue_timeout = app.config['MOOD_ENQUEUE_TIMEOUT']
+        self.fsync = app.config['MOOD_SPILL_FSYNC']
+        self.spill_dir = app.config['MOOD_SPILL_DIR'] or os.path.join(app.instance_path, 'mood-spill')
+
+        # Started by the first request, so `flask` CLI commands never run it
+        @app.before_request
+        def _start_mood_buffer():
+            self.start(app)
+
+    def start(self, app):
+        with self._cond:
+            if self._thread is not None:
+                return
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self._spill, self._spill_path = self._open_spill()
+            self._claim_orphans(app)
+            self._thread = threading.Thread(
+                target=self._run, args=(app,), name='mood-flusher', daemon=True
+            )
+            self._thread.start()
+        atexit.register(self.stop)
+
+    def _open_spill(self, rows=()):
+        """A new locked spill file holding `rows`, and its path. It is written
+        under a staging name first, so no other process claims it half-written."""
+        # Unique per file: a restarted worker may reuse a dead one's pid
+        name = f'{SPILL_PREFIX}{uuid4().hex}.log'
+        staging = os.path.join(self.spill_dir, STAGING_PREFIX + name)
+        spill = open(staging, 'a+')
+        fcntl.flock(spill, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        spill.writelines(self._encode(row) for row in rows)
+        spill.flush()
+        if self.fsync:
+            os.fsync(spill.fileno())
+        path = os.path.join(self.spill_dir, name)
+        os.rename(staging, path)
+        return spill, path
+
+    def _rotate(self):
+        """Replace the spill file with one holding only what is still queued.
+        Called with `_cond` held."""
+        old, old_path = self._spill, self._spill_path
+        self._spill, self._spill_path = self._open_spill(self._pending)
+        # The new file has every queued entry, so a crash from here on loses nothing
+        os.unlink(old_path)
+        old.close()
+
+    def _claim_orphans(self, app):
+        """Adopt every other spill file whose lock is free: its writer is gone."""
+        own = os.path.realpath(self._spill_path)
+        for name in sorted(os.listdir(self.spill_dir)):
+            path = os.path.join(self.spill_dir, name)
+            if name.startswith(STAGING_PREFIX):
+                self._discard_staging(path)
+                continue
+            if not name.startswith(SPILL_PREFIX) or os.path.realpath(path) == own:
+                continue
+            with open(path) as orphan:
+                try:
+                    fcntl.flock(orphan, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # a live process owns it
+                lines = [line for line in orphan if line.endswith('\n')]
+                # Copy into our own log before deleting, so a crash here loses nothing
+                self._spill.writelines(lines)
+                self._sync()
+                self._pending.extend(self._decode(line) for line in lines)
+                os.unlink(path)
+            if lines:
+                app.logger.info('Recovered %d buffered moods from %s', len(lines), name)
+
+    @staticmethod
+    def _discard_staging(path):
+        """Delete a staging file left by a writer that died mid-rotation. It
+        only held copies of entries still in that writer's spill file."""
+        with open(path) as staging:
+            try:
+                fcntl.flock(staging, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # being written right now
+            os.unlink(path)
+
+    @staticmethod
+    def _encode(row):
+        return json.dumps({**row, 'created_at': row['created_at'].isoformat()}) + '\n'
+
+    @staticmethod
+    def _decode(line):
+        row = json.loads(line)
+        row['created_at'] = datetime.fromisoformat(row['created_at'])
+        return row
+
+    def _sync(self):
+        self._spill.flush()
+        if self.fsync:
+            os.fsync(self._spill.fileno())
+
+    def submit(self, user_id, emotion_label):
+        """Queue one check-in and return its row dict. Blocks up to
+        MOOD_ENQUEUE_TIMEOUT for room, then raises BufferFull."""
+        row = {
+            'ref': uuid4().hex,
+            'user_id': user_id,
+            'emotion_label': emotion_label,
+            'created_at': datetime.utcnow(),
+        }
+        line = self._encode(row)
+
+        with self._cond:
+            if self._thread is None or self._stopping:
+                raise BufferFull('Mood buffer is not running')
+            if not self._cond.wait_for(lambda: len(self._pending) < self.maxsize,
+                                       timeout=self.enqueue_timeout):
+                self.rejected += 1
+                raise BufferFull('Mood buffer is full')
+            self._spill.write(line)
+            self._sync()
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return row
+
+    def _run(self, app):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._pending) >= self.batch_size or self._stopping,
+                    timeout=self.interval
+                )
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                self._in_flight = len(batch)
+                self._cond.notify_all()  # room for blocked submitters
+                if not batch and self._stopping:
+                    return
+
+            if batch and not self._flush(app, batch):
+                with self._cond:
+                    # Keep them (they are still in the spill file) and back off
+                    self._pending.extendleft(reversed(batch))
+                    self._in_flight = 0
+                    if self._stopping:
+                        return
+                time.sleep(self.interval)
+                continue
+
+            with self._cond:
+                self._in_flight = 0
+                if not self._pending:
+                    self._spill.truncate(0)
+                    self._sync()
+                elif batch:
+                    # Check-ins arrived during the flush; under steady load the
+                    # queue is never empty, so start over rather than append forever
+                    self._rotate()
+
+    def _flush(self, app, batch):
+        """Write `batch`. Returns False if the database is unreachable, so the
+        caller keeps the rows and retries later."""
+        try:
+            self._write(app, batch)
+            return True
+        except (OperationalError, InterfaceError):
+            app.logger.exception('Flushing %d buffered moods failed, will retry', len(batch))
+            return False
+        except Exception as e:
+            if len(batch) == 1:
+                self._dead_letter(app, batch[0], e)
+                return True
+            # Some row is bad: halve until it is alone (refs make rewrites harmless)
+            middle = len(batch) // 2
+            return self._flush(app, batch[:middle]) and self._flush(app, batch[middle:])
+
+    def _write(self, app, batch):
+        with app.app_context():
+            # Users deleted since their check-in was accepted would fail the whole batch
+            user_ids = {row['user_id'] for row in batch}
+            existing = set(db.session.scalars(db.select(User.id).where(User.id.in_(user_ids))))
+            Mood.insert_new([row for row in batch if row['user_id'] in existing])
+            db.session.commit()
+        self.flushed += len(batch)
+
+    def _dead_letter(self, app, row, error):
+        app.logger.error('Dropping buffered mood %s to %s: %r', row['ref'], DEAD_LETTER_FILE, error)
+        with open(os.path.join(self.spill_dir, DEAD_LETTER_FILE), 'a') as f:
+            f.write(json.dumps({**row, 'created_at': row['created_at'].isoformat(), 'error': repr(error)}) + '\n')
+        self.dead_lettered += 1
+
+    def stop(self, timeout=30):
+        """Flush what is queued and stop the flusher (runs at exit)."""
+        with self._cond:
+            if self._thread is None:
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'queued': len(self._pending),
+                'in_flight': self._in_flight,
+                'flushed': self.flushed,
+                'rejected': self.rejected,
+                'dead_lettered': self.dead_lettered,
+            }
+
+
+mood_buffer = MoodBuffer()
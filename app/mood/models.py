@@ -1,5 +1,8 @@
-from app.db import db, bcrypt
+from app.db import db, bcrypt, upsert_increment, insert_ignore
 from datetime import datetime
+from uuid import uuid4
+from collections import Counter
+from app.serializers import RowSerializer, iso
 
 class Mood(db.Model):
     __tablename__ = 'moods'
@@ -8,8 +11,14 @@ class Mood(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     emotion_label = db.Column(db.String(50), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Client-visible id, known before the row is written (see app/mood/buffer.py)
+    ref = db.Column(db.String(32), unique=True, nullable=True, default=lambda: uuid4().hex)
 
     user = db.relationship('User', backref=db.backref('moods', lazy=True))  
+
+    __table_args__ = (
+        db.Index('ix_moods_user_created', 'user_id', 'created_at'),
+    )
     
     
     def to_dict(self):
@@ -17,5 +26,64 @@ class Mood(db.Model):
             'id': self.id,
             'user_id': self.user_id,
             'emotion_label': self.emotion_label,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': iso(self.created_at),
+            'ref': self.ref
         }
+
+    @classmethod
+    def insert_new(cls, rows):
+        """Bulk-insert `rows` (dicts with a `ref`), skipping refs already
+        stored, and add only the inserted moods to the rollups. Safe to call
+        again with rows that were partly written before."""
+        if not rows:
+            return 0
+        inserted = db.session.execute(
+            insert_ignore(cls, ('ref',)).returning(cls.user_id, cls.emotion_label, cls.created_at),
+            rows
+        ).all()
+        MoodDailyRollup.record([
+            cls(user_id=user_id, emotion_label=label, created_at=created_at)
+            for user_id, label, created_at in inserted
+        ])
+        return len(inserted)
+
+
+# Column-tuple equivalent of Mood.to_dict for list endpoints
+MOOD_SERIALIZER = RowSerializer(
+    [Mood.id, Mood.user_id, Mood.emotion_label, Mood.created_at, Mood.ref],
+    {'created_at': iso}
+)
+
+
+class MoodDailyRollup(db.Model):
+    """Per-user, per-day tally of mood check-ins by emotion.
+
+    Kept up to date incrementally as moods are written so summaries never
+    have to scan the raw `moods` table.
+    """
+    __tablename__ = 'mood_daily_rollups'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    emotion_label = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def record(cls, moods):
+        """Add `moods` to the rollups in the current transaction.
+
+        Moods must already be flushed so `created_at` is populated. All
+        increments are issued as a single upsert statement.
+        """
+        counts = Counter(
+            (m.user_id, m.created_at.date(), m.emotion_label.lower()) for m in moods
+        )
+        if not counts:
+            return
+
+        rows = [
+            {'user_id': user_id, 'day': day, 'emotion_label': label, 'count': n}
+            for (user_id, day, label), n in counts.items()
+        ]
+
+        upsert_increment(cls, rows, ('user_id', 'day', 'emotion_label'), 'count')
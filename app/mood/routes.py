@@ -1,46 +1,244 @@
 from app.db import db
 from flask import Blueprint
-from flask import request, jsonify
-from app.mood.models import Mood
-from app.mood.utilis import get_mood_message
+from flask import current_app, request, jsonify, g
+from datetime import date, datetime, timedelta, timezone
+import click
+from app.mood.models import Mood, MoodDailyRollup, MOOD_SERIALIZER
+from app.mood.utilis import get_mood_message, request_locale
+from app.mood.buffer import mood_buffer, BufferFull
+from app.streaming import wants_ndjson, ndjson_response
+from app.conditional import conditional, version_of
+from app.auth.identity import identity_required
 
 mood_bp =Blueprint('mood', __name__,url_prefix="/mood")
 
+
+def emotion_label_error(label):
+    """Why `label` can't be stored as a mood's emotion_label, or None if it can."""
+    max_length = Mood.emotion_label.type.length
+    if not isinstance(label, str) or not label.strip() or len(label) > max_length:
+        return f'emotion_label must be a non-empty string of at most {max_length} characters'
+    return None
+
+
 @mood_bp.route('/add-mood', methods=['POST'])
+@identity_required
 def add_mood():
-    data = request.get_json()
+    data = request.get_json() or {}
+
+    # Checked up front so the write-behind flusher never receives a row the database rejects
+    error = emotion_label_error(data.get('emotion_label'))
+    if error:
+        return jsonify({'message': error}), 400
+
+    if mood_buffer.enabled:
+        return queue_mood(g.identity.id, data['emotion_label'])
     
     new_mood = Mood(
-        user_id=data['user_id'],
+        user_id=g.identity.id,
         emotion_label=data['emotion_label']
     )
     
     db.session.add(new_mood)
+    db.session.flush()  # populate created_at for the rollup
+    MoodDailyRollup.record([new_mood])
     db.session.commit()
     
-    message = get_mood_message(new_mood.emotion_label)
+    message = get_mood_message(new_mood.emotion_label, request_locale(request))
     
     return jsonify({
         'id': new_mood.id,
         'user_id': new_mood.user_id,
         'emotion_label': new_mood.emotion_label,
         'created_at': new_mood.created_at,
+        'ref': new_mood.ref,
         'message': message
     }), 201
 
+
+# Write-behind mode: accept now, insert with the next flush. `ref` is the
+# mood's permanent id; it appears in GET /mood/<user_id> once written.
+def queue_mood(user_id, emotion_label):
+    try:
+        row = mood_buffer.submit(user_id, emotion_label)
+    except BufferFull:
+        response = jsonify({'message': 'Too many check-ins right now, please retry shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+    return jsonify({
+        'ref': row['ref'],
+        'user_id': row['user_id'],
+        'emotion_label': row['emotion_label'],
+        'created_at': row['created_at'],
+        'status': 'queued',
+        'message': get_mood_message(row['emotion_label'], request_locale(request))
+    }), 202
+
+MAX_BATCH_SIZE = 500
+MAX_CLOCK_SKEW = timedelta(minutes=5)  # how far ahead of the server a client's created_at may be
+
+
+def _parse_batch_entry(entry, user_id):
+    """Validate one /mood/batch item for the caller `user_id`. Returns (row, error)."""
+    if not isinstance(entry, dict):
+        return None, 'entry must be an object'
+
+    # user_id is optional; when given it must be the caller's own
+    if entry.get('user_id', user_id) != user_id:
+        return None, 'user_id must be your own'
+    emotion_label = entry.get('emotion_label')
+    error = emotion_label_error(emotion_label)
+    if error:
+        return None, error
+
+    now = datetime.utcnow()
+    created_at = now
+    if entry.get('created_at'):
+        try:
+            created_at = datetime.fromisoformat(entry['created_at'])
+        except (TypeError, ValueError):
+            return None, 'created_at must be an ISO 8601 datetime'
+        # Stored as naive UTC like every other created_at; a value without an offset is taken as UTC
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        if created_at > now + MAX_CLOCK_SKEW:
+            return None, 'created_at must not be in the future'
+
+    return {'user_id': user_id, 'emotion_label': emotion_label, 'created_at': created_at}, None
+
+
+# Add many of the caller's mood check-ins at once (offline sync). All-or-nothing.
+@mood_bp.route('/batch', methods=['POST'])
+@identity_required
+def add_mood_batch():
+    data = request.get_json(silent=True)
+    entries = data.get('moods') if isinstance(data, dict) else data
+
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'message': 'Expected a non-empty array of mood entries'}), 400
+    if len(entries) > MAX_BATCH_SIZE:
+        return jsonify({'message': f'At most {MAX_BATCH_SIZE} entries per batch'}), 400
+
+    rows, errors = [], []
+    for index, entry in enumerate(entries):
+        row, error = _parse_batch_entry(entry, g.identity.id)
+        if error:
+            errors.append({'index': index, 'error': error})
+        rows.append(row)
+
+    if errors:
+        return jsonify({'message': 'Invalid mood entries', 'errors': errors}), 400
+
+    try:
+        ids = db.session.execute(
+            db.insert(Mood).returning(Mood.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        MoodDailyRollup.record([Mood(**row) for row in rows])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Error saving mood entries', 'error': str(e)}), 500
+
+    locale = request_locale(request)
+    results = [{
+        'index': index,
+        'id': mood_id,
+        'user_id': row['user_id'],
+        'emotion_label': row['emotion_label'],
+        'created_at': row['created_at'].isoformat(),
+        'message': get_mood_message(row['emotion_label'], locale)
+    } for index, (mood_id, row) in enumerate(zip(ids, rows))]
+
+    return jsonify({'results': results, 'count': len(results)}), 201
+
 # Get mood logs for a user
 @mood_bp.route('/<int:user_id>', methods=['GET'])
+@conditional(lambda user_id: version_of(Mood.query.filter_by(user_id=user_id), Mood.id, Mood.created_at))
 def get_mood(user_id):
-    moods = Mood.query.filter_by(user_id=user_id).order_by(Mood.created_at.desc()).all()
+    query = MOOD_SERIALIZER.select(
+        Mood.query.filter_by(user_id=user_id).order_by(Mood.created_at.desc())
+    )
+
+    if wants_ndjson():
+        return ndjson_response(query, MOOD_SERIALIZER.row)
+
+    mood_list = MOOD_SERIALIZER.rows(query.all())
     
-    if not moods:
+    if not mood_list:
         return jsonify({'message': 'No mood entries found', 'moods': []}), 200
     
-    mood_list = [{
-        'id': mood.id,
-        'user_id': mood.user_id,
-        'emotion_label': mood.emotion_label,
-        'created_at': mood.created_at.isoformat() if mood.created_at else None
-    } for mood in moods]
-    
-    return jsonify({'moods': mood_list, 'count': len(mood_list)}), 200
\ No newline at end of file
+    return jsonify({'moods': mood_list, 'count': len(mood_list)}), 200
+
+
+def _bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+# Aggregated mood counts for a user, read from the daily rollups only
+@mood_bp.route('/<int:user_id>/summary', methods=['GET'])
+def get_mood_summary(user_id):
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in ('day', 'week', 'month'):
+        return jsonify({'message': 'bucket must be one of day, week, month'}), 400
+
+    try:
+        end = date.fromisoformat(request.args['to']) if 'to' in request.args else datetime.utcnow().date()
+        start = date.fromisoformat(request.args['from']) if 'from' in request.args else end - timedelta(days=29)
+    except ValueError:
+        return jsonify({'message': 'from and to must be YYYY-MM-DD dates'}), 400
+
+    rollups = MoodDailyRollup.query.filter(
+        MoodDailyRollup.user_id == user_id,
+        MoodDailyRollup.day >= start,
+        MoodDailyRollup.day <= end
+    ).order_by(MoodDailyRollup.day.asc()).all()
+
+    periods = {}
+    for r in rollups:
+        period = periods.setdefault(_bucket_start(r.day, bucket), {})
+        period[r.emotion_label] = period.get(r.emotion_label, 0) + r.count
+
+    summary = [{
+        'period': period.isoformat(),
+        'counts': counts,
+        'total': sum(counts.values())
+    } for period, counts in periods.items()]
+
+    return jsonify({
+        'user_id': user_id,
+        'bucket': bucket,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'summary': summary
+    }), 200
+
+
+@mood_bp.cli.command('backfill-rollups')
+@click.option('--batch-size', default=1000, show_default=True, help='Users per batch.')
+def backfill_rollups(batch_size):
+    """Rebuild mood_daily_rollups from the moods table."""
+    day = db.func.date(Mood.created_at)
+    label = db.func.lower(Mood.emotion_label)
+    max_user_id = db.session.query(db.func.max(Mood.user_id)).scalar() or 0
+
+    for lo in range(0, max_user_id + 1, batch_size):
+        hi = lo + batch_size
+        MoodDailyRollup.query.filter(
+            MoodDailyRollup.user_id >= lo, MoodDailyRollup.user_id < hi
+        ).delete(synchronize_session=False)
+
+        totals = db.select(Mood.user_id, day, label, db.func.count())\
+            .where(Mood.user_id >= lo, Mood.user_id < hi, Mood.created_at.isnot(None))\
+            .group_by(Mood.user_id, day, label)
+        db.session.execute(
+            db.insert(MoodDailyRollup).from_select(
+                ['user_id', 'day', 'emotion_label', 'count'], totals
+            )
+        )
+        db.session.commit()
+        click.echo(f'Rebuilt rollups for users {lo}-{hi - 1}')
@@ -0,0 +1,61 @@
+# app/pagination.py
+import base64
+import json
+from datetime import datetime
+
+from flask import request
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue."""
+
+
+def encode_cursor(created_at, row_id):
+    """Pack the (created_at, id) of the last row of a page into an opaque token."""
+    payload = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Inverse of `encode_cursor`. Returns (created_at, id)."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(created_at) if created_at else None
+        return created_at, int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def get_limit():
+    """Read `?limit=` from the request, clamped to [1, MAX_LIMIT]."""
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def keyset_page(query, created_col, id_col, cursor=None, limit=DEFAULT_LIMIT):
+    """Return one newest-first page of `query` and the cursor for the next one.
+
+    Rows are ordered by (created_at DESC, id DESC) and the cursor is the
+    position of the last row returned, so every page is a single index range
+    scan no matter how deep the client has scrolled.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(
+            (created_col < created_at) |
+            ((created_col == created_at) & (id_col < row_id))
+        )
+
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+
+    return rows, next_cursor
@@ -0,0 +1,80 @@
+# app/serializers.py
+from functools import lru_cache
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib json provider
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Output matches the default provider: keys are sorted and datetimes are
+    still rendered as HTTP dates by `DefaultJSONProvider.default`.
+    """
+    option = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        option = self.option
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def init_json(app):
+    """Use orjson for jsonify/request.get_json when it is installed."""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+
+
+@lru_cache(maxsize=4096)
+def _day_label(day):
+    return day.strftime("%a, %b %d, %Y")
+
+
+def day_label(value):
+    """Format a datetime as e.g. 'Sun, Oct 18, 2026', memoised per calendar day."""
+    return _day_label(value.date()) if value else None
+
+
+def iso(value):
+    return value.isoformat() if value else None
+
+
+class RowSerializer:
+    """Serialize query results from plain column tuples instead of ORM objects.
+
+    `columns` are model attributes; `formatters` maps a column key to a
+    function applied to its value. Only the listed columns are selected, so
+    no ORM identity-map or attribute instrumentation cost is paid per row.
+    """
+
+    def __init__(self, columns, formatters=None):
+        self.columns = tuple(columns)
+        self.keys = tuple(c.key for c in self.columns)
+        self.formatters = tuple((formatters or {}).items())
+
+    @classmethod
+    def for_model(cls, model, formatters=None):
+        return cls([getattr(model, c.key) for c in model.__table__.columns], formatters)
+
+    def select(self, query):
+        return query.with_entities(*self.columns)
+
+    def row(self, row):
+        data = dict(zip(self.keys, row))
+        for key, fmt in self.formatters:
+            data[key] = fmt(data[key])
+        return data
+
+    def rows(self, rows):
+        return [self.row(r) for r in rows]
+
+    def all(self, query):
+        return self.rows(self.select(query).all())
@@ -0,0 +1,36 @@
+# app/streaming.py
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+YIELD_PER = 500
+
+
+def wants_ndjson():
+    """True if the client asked for `?format=ndjson` or `Accept: application/x-ndjson`."""
+    if request.args.get('format') == 'ndjson':
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def ndjson_response(query, serialize, yield_per=YIELD_PER):
+    """Stream `query` as newline-delimited JSON, one row per line.
+
+    Rows are fetched with `yield_per` (a server-side cursor on Postgres) and
+    encoded one at a time, so memory stays flat however many rows match.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        for row in query.yield_per(yield_per):
+            yield dumps(serialize(row)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+def ndjson_events(events):
+    """Stream each dict from the `events` generator as one NDJSON line as soon as it is yielded."""
+    dumps = current_app.json.dumps
+    return Response(
+        stream_with_context(dumps(event) + '\n' for event in events),
+        mimetype=NDJSON_MIMETYPE
+    )
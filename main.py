@@ -37,10 +37,10 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Built once per process; WSGI servers and the `flask` CLI import `main:app`
 app = create_app()
 
 if __name__ == "__main__":
-    app = create_app()
     with app.app_context():
         db.create_all()  # create tables if not exist
     app.run(host='0.0.0.0',debug=True,port=5501)
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""Drop single-column unique constraints on community_memberships
+
+Revision ID: 2b7d5e9c4a10
+Revises: f3c8a2d61e97
+Create Date: 2026-10-18 21:12:37.904513
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b7d5e9c4a10'
+down_revision = 'f3c8a2d61e97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # user_id and community_id were each unique, so a user could join only one
+    # community and a community could hold only one member. The pair is still
+    # unique through unique_user_community. Only tables built by create_all()
+    # have these constraints, under Postgres' default names; the migrations
+    # never created them, and SQLite databases are built by the migrations.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER TABLE community_memberships DROP CONSTRAINT IF EXISTS community_memberships_user_id_key')
+        op.execute('ALTER TABLE community_memberships DROP CONSTRAINT IF EXISTS community_memberships_community_id_key')
+
+
+def downgrade():
+    # Nothing to restore for databases that never had the constraints
+    pass
@@ -0,0 +1,28 @@
+"""Add keyset pagination indexes to journal_entries
+
+Revision ID: 3c1f7a9d2b64
+Revises: 885e3412519e
+Create Date: 2026-10-18 09:12:31.402116
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f7a9d2b64'
+down_revision = '885e3412519e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('journal_entries', schema=None) as batch_op:
+        batch_op.create_index('ix_journal_entries_user_created_id', ['user_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_journal_entries_created_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('journal_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_journal_entries_created_id')
+        batch_op.drop_index('ix_journal_entries_user_created_id')
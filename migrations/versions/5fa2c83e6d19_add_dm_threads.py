@@ -0,0 +1,62 @@
+"""Add dm_threads table and conversation index on direct_messages
+
+Revision ID: 5fa2c83e6d19
+Revises: e91b5f07a3d2
+Create Date: 2026-10-18 14:58:02.275913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5fa2c83e6d19'
+down_revision = 'e91b5f07a3d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('direct_messages', schema=None) as batch_op:
+        batch_op.create_index('ix_direct_messages_pair_created', ['sender_id', 'recipient_id', 'created_at'], unique=False)
+
+    op.create_table('dm_threads',
+    sa.Column('user_low_id', sa.Integer(), nullable=False),
+    sa.Column('user_high_id', sa.Integer(), nullable=False),
+    sa.Column('last_message_id', sa.Integer(), nullable=False),
+    sa.Column('last_at', sa.DateTime(), nullable=False),
+    sa.Column('unread_low', sa.Integer(), nullable=False),
+    sa.Column('unread_high', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['last_message_id'], ['direct_messages.id'], ),
+    sa.ForeignKeyConstraint(['user_high_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['user_low_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_low_id', 'user_high_id')
+    )
+    with op.batch_alter_table('dm_threads', schema=None) as batch_op:
+        batch_op.create_index('ix_dm_threads_low_last', ['user_low_id', 'last_at'], unique=False)
+        batch_op.create_index('ix_dm_threads_high_last', ['user_high_id', 'last_at'], unique=False)
+
+    # Build one thread per existing conversation
+    op.execute(
+        "INSERT INTO dm_threads "
+        "(user_low_id, user_high_id, last_message_id, last_at, unread_low, unread_high) "
+        "SELECT low_id, high_id, MAX(id), MAX(created_at), "
+        "SUM(CASE WHEN recipient_id = low_id AND is_read = false THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN recipient_id = high_id AND is_read = false THEN 1 ELSE 0 END) "
+        "FROM (SELECT id, created_at, recipient_id, is_read, "
+        "CASE WHEN sender_id < recipient_id THEN sender_id ELSE recipient_id END AS low_id, "
+        "CASE WHEN sender_id < recipient_id THEN recipient_id ELSE sender_id END AS high_id "
+        "FROM direct_messages) AS dm "
+        "GROUP BY low_id, high_id"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('dm_threads', schema=None) as batch_op:
+        batch_op.drop_index('ix_dm_threads_high_last')
+        batch_op.drop_index('ix_dm_threads_low_last')
+
+    op.drop_table('dm_threads')
+
+    with op.batch_alter_table('direct_messages', schema=None) as batch_op:
+        batch_op.drop_index('ix_direct_messages_pair_created')
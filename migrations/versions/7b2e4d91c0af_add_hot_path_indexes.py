@@ -0,0 +1,61 @@
+"""Add composite and partial indexes for hot lookup paths
+
+Revision ID: 7b2e4d91c0af
+Revises: 3c1f7a9d2b64
+Create Date: 2026-10-18 10:03:47.118520
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2e4d91c0af'
+down_revision = '3c1f7a9d2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('moods', schema=None) as batch_op:
+        batch_op.create_index('ix_moods_user_created', ['user_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_reset_token', ['reset_token'], unique=False,
+                              postgresql_where=sa.text('reset_token IS NOT NULL'),
+                              sqlite_where=sa.text('reset_token IS NOT NULL'))
+
+    with op.batch_alter_table('community_messages', schema=None) as batch_op:
+        batch_op.create_index('ix_community_messages_community_created', ['community_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('direct_messages', schema=None) as batch_op:
+        batch_op.create_index('ix_direct_messages_recipient_created', ['recipient_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_direct_messages_recipient_unread', ['recipient_id'], unique=False,
+                              postgresql_where=sa.text('is_read = false'),
+                              sqlite_where=sa.text('is_read = 0'))
+
+    with op.batch_alter_table('connections', schema=None) as batch_op:
+        batch_op.create_index('ix_connections_requester_status', ['requester_id', 'status'], unique=False)
+        batch_op.create_index('ix_connections_addressee_status', ['addressee_id', 'status'], unique=False)
+
+    # community_memberships(user_id, community_id) is already covered by the
+    # unique_user_community constraint added in 885e3412519e.
+
+
+def downgrade():
+    with op.batch_alter_table('connections', schema=None) as batch_op:
+        batch_op.drop_index('ix_connections_addressee_status')
+        batch_op.drop_index('ix_connections_requester_status')
+
+    with op.batch_alter_table('direct_messages', schema=None) as batch_op:
+        batch_op.drop_index('ix_direct_messages_recipient_unread')
+        batch_op.drop_index('ix_direct_messages_recipient_created')
+
+    with op.batch_alter_table('community_messages', schema=None) as batch_op:
+        batch_op.drop_index('ix_community_messages_community_created')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_reset_token')
+
+    with op.batch_alter_table('moods', schema=None) as batch_op:
+        batch_op.drop_index('ix_moods_user_created')
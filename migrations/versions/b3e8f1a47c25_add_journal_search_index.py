@@ -0,0 +1,46 @@
+"""Add full-text search index on journal_entries
+
+Revision ID: b3e8f1a47c25
+Revises: 0d6e3b48f7c1
+Create Date: 2026-10-18 17:42:09.118206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8f1a47c25'
+down_revision = '0d6e3b48f7c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Kept out of the models (see app/journals/search.py): a generated tsvector
+    # column + GIN index on Postgres, an external-content FTS5 table on SQLite.
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(content, '')), 'B')) STORED"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_journal_entries_search ON journal_entries USING gin (search_vector)")
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS journal_entries_fts USING fts5("
+            "title, content, content='journal_entries', content_rowid='id', "
+            "tokenize='porter unicode61')"
+        )
+        op.execute("INSERT INTO journal_entries_fts(journal_entries_fts) VALUES('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_journal_entries_search")
+        op.execute("ALTER TABLE journal_entries DROP COLUMN IF EXISTS search_vector")
+    elif dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS journal_entries_fts")
@@ -0,0 +1,32 @@
+"""Add mood_daily_rollups table
+
+Revision ID: c4d8a1e6f352
+Revises: 7b2e4d91c0af
+Create Date: 2026-10-18 11:26:05.930144
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d8a1e6f352'
+down_revision = '7b2e4d91c0af'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('mood_daily_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('emotion_label', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'day', 'emotion_label')
+    )
+    # Populate with `flask mood backfill-rollups` after upgrading.
+
+
+def downgrade():
+    op.drop_table('mood_daily_rollups')
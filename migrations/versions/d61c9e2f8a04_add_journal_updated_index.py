@@ -0,0 +1,26 @@
+"""Add updated_at index to journal_entries
+
+Revision ID: d61c9e2f8a04
+Revises: b3e8f1a47c25
+Create Date: 2026-10-18 18:20:37.905412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd61c9e2f8a04'
+down_revision = 'b3e8f1a47c25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('journal_entries', schema=None) as batch_op:
+        batch_op.create_index('ix_journal_entries_updated', ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('journal_entries', schema=None) as batch_op:
+        batch_op.drop_index('ix_journal_entries_updated')
@@ -0,0 +1,29 @@
+"""Add client-visible ref to moods
+
+Revision ID: e5a17c9d3b62
+Revises: d61c9e2f8a04
+Create Date: 2026-10-18 18:52:09.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a17c9d3b62'
+down_revision = 'd61c9e2f8a04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows keep a NULL ref; NULLs don't collide in a unique index
+    with op.batch_alter_table('moods', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ref', sa.String(length=32), nullable=True))
+        batch_op.create_unique_constraint('uq_moods_ref', ['ref'])
+
+
+def downgrade():
+    with op.batch_alter_table('moods', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_moods_ref', type_='unique')
+        batch_op.drop_column('ref')
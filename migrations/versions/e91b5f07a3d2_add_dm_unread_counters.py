@@ -0,0 +1,35 @@
+"""Add dm_unread_counters table
+
+Revision ID: e91b5f07a3d2
+Revises: c4d8a1e6f352
+Create Date: 2026-10-18 13:41:19.662034
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91b5f07a3d2'
+down_revision = 'c4d8a1e6f352'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('dm_unread_counters',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('unread_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Seed counters from the messages that are already unread
+    op.execute(
+        "INSERT INTO dm_unread_counters (user_id, unread_count) "
+        "SELECT recipient_id, COUNT(*) FROM direct_messages "
+        "WHERE is_read = false GROUP BY recipient_id"
+    )
+
+
+def downgrade():
+    op.drop_table('dm_unread_counters')
@@ -0,0 +1,66 @@
+# tests/conftest.py
+import os
+
+# Config reads the environment at import time, so set it before importing app
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['JWT_SECRET_KEY'] = 'test-secret-key-at-least-32-bytes-long'
+os.environ['MOOD_WRITE_BEHIND'] = 'false'
+os.environ['PASSWORD_HASH_COST'] = '4'
+os.environ['PASSWORD_SCHEME'] = 'bcrypt'
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app, db
+from app.auth.identity import identity_claims
+from app.auth.models import User
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    """Create and commit a user; the password hash is a placeholder."""
+    def make(username, role='user'):
+        user = User(username=username, email=f'{username}@example.com', role=role, password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Authorization headers carrying an access token for `user`."""
+    def headers(user):
+        token = create_access_token(identity=str(user.id), additional_claims=identity_claims(user, ()))
+        return {'Authorization': f'Bearer {token}'}
+    return headers
+
+
+@pytest.fixture
+def statements(app):
+    """Every (sql, parameters) the engine executes while the test runs."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(db.engine, 'before_cursor_execute', record)
@@ -0,0 +1,13 @@
+# tests/test_hashing.py
+"""A misspelt PASSWORD_SCHEME stops the app from starting."""
+import pytest
+
+from app import create_app
+from app.config import Config
+
+
+def test_unknown_password_scheme_fails_at_startup(monkeypatch):
+    monkeypatch.setattr(Config, 'PASSWORD_SCHEME', 'scrpyt')
+
+    with pytest.raises(ValueError, match="PASSWORD_SCHEME must be one of .* not 'scrpyt'"):
+        create_app()
@@ -0,0 +1,90 @@
+# tests/test_identity.py
+"""Routes act as the caller named by the access token, never as a user id
+supplied in the request body or path."""
+from app.community.models import Community, Connection, DirectMessage
+
+
+def test_direct_message_is_sent_as_the_caller(client, make_user, auth_headers):
+    alice, bob, mallory = make_user('alice'), make_user('bob'), make_user('mallory')
+
+    response = client.post('/community/message/direct', headers=auth_headers(mallory), json={
+        'sender_id': alice.id, 'recipient_id': bob.id, 'content': 'hi'
+    })
+
+    assert response.status_code == 201
+    assert DirectMessage.query.one().sender_id == mallory.id
+
+
+def test_community_is_owned_by_the_caller(client, make_user, auth_headers):
+    alice, mallory = make_user('alice'), make_user('mallory')
+
+    response = client.post('/community/create', headers=auth_headers(mallory), json={
+        'name': 'calm', 'owner_id': alice.id
+    })
+
+    assert response.status_code == 201
+    assert Community.query.one().owner_id == mallory.id
+
+
+def test_connection_is_requested_by_the_caller(client, make_user, auth_headers):
+    alice, bob, mallory = make_user('alice'), make_user('bob'), make_user('mallory')
+
+    response = client.post('/community/connect', headers=auth_headers(mallory), json={
+        'requester_id': alice.id, 'addressee_id': bob.id
+    })
+
+    assert response.status_code == 201
+    assert Connection.query.one().requester_id == mallory.id
+
+
+def test_writes_need_a_token(client, make_user):
+    alice, bob = make_user('alice'), make_user('bob')
+
+    assert client.post('/community/message/direct', json={
+        'sender_id': alice.id, 'recipient_id': bob.id, 'content': 'hi'}).status_code == 401
+    assert client.post('/community/create', json={'name': 'calm', 'owner_id': alice.id}).status_code == 401
+    assert client.post('/community/connect', json={
+        'requester_id': alice.id, 'addressee_id': bob.id}).status_code == 401
+
+
+def test_mark_read_only_touches_the_callers_messages(client, make_user, auth_headers):
+    alice, bob, mallory = make_user('alice'), make_user('bob'), make_user('mallory')
+    client.post('/community/message/direct', headers=auth_headers(bob),
+                json={'recipient_id': alice.id, 'content': 'hi'})
+    message = DirectMessage.query.one()
+
+    bulk = client.post('/community/messages/read', headers=auth_headers(mallory),
+                       json={'user_id': alice.id, 'up_to_id': message.id})
+    single = client.post(f'/community/message/{message.id}/read', headers=auth_headers(mallory),
+                         json={'user_id': alice.id})
+
+    assert bulk.get_json()['marked'] == 0
+    assert single.status_code == 403
+    assert DirectMessage.query.one().is_read is False
+    assert client.get(f'/community/messages/unread-count/{alice.id}',
+                      headers=auth_headers(alice)).get_json()['unread_count'] == 1
+
+
+def test_unread_count_is_private(client, make_user, auth_headers):
+    alice, mallory = make_user('alice'), make_user('mallory')
+
+    assert client.get(f'/community/messages/unread-count/{alice.id}').status_code == 401
+    assert client.get(f'/community/messages/unread-count/{alice.id}',
+                      headers=auth_headers(mallory)).status_code == 403
+
+
+def test_threads_are_private(client, make_user, auth_headers):
+    alice, bob, mallory = make_user('alice'), make_user('bob'), make_user('mallory')
+    client.post('/community/message/direct', headers=auth_headers(bob),
+                json={'recipient_id': alice.id, 'content': 'hi'})
+
+    assert client.get(f'/community/threads/{alice.id}').status_code == 401
+    assert client.get(f'/community/threads/{alice.id}', headers=auth_headers(mallory)).status_code == 403
+    assert client.get(f'/community/threads/{alice.id}/{bob.id}/messages',
+                      headers=auth_headers(mallory)).status_code == 403
+
+    threads = client.get(f'/community/threads/{alice.id}', headers=auth_headers(alice)).get_json()
+    messages = client.get(f'/community/threads/{alice.id}/{bob.id}/messages',
+                          headers=auth_headers(alice)).get_json()
+    assert [t['peer_id'] for t in threads['threads']] == [bob.id]
+    assert [m['content'] for m in messages['messages']] == ['hi']
@@ -0,0 +1,79 @@
+# tests/test_indexes.py
+"""The hot lookup paths resolve through an index, not a full table scan.
+
+Each case issues a real request, then replays every SELECT it ran under
+SQLite's EXPLAIN QUERY PLAN. SQLite reports a full table scan as a bare
+`SCAN <table>`; index-driven steps read `SEARCH ...` or `SCAN ... USING
+INDEX`.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.community.models import Community, CommunityMembership, CommunityMessage, DirectMessage, Connection
+from app.journals.models import Journal
+from app.mood.models import Mood
+
+
+@pytest.fixture
+def seeded(make_user):
+    alice, bob = make_user('alice'), make_user('bob')
+    community = Community(name='calm', owner_id=alice.id)
+    db.session.add(community)
+    db.session.flush()
+    db.session.add_all([
+        CommunityMembership(user_id=alice.id, community_id=community.id),
+        CommunityMessage(community_id=community.id, user_id=alice.id, content='hi'),
+        DirectMessage(sender_id=bob.id, recipient_id=alice.id, content='hey'),
+        Connection(requester_id=alice.id, addressee_id=bob.id, status='accepted', accepted_at=datetime.utcnow()),
+        Journal(user_id=alice.id, title='t', content='c'),
+        Mood(user_id=alice.id, emotion_label='calm'),
+    ])
+    alice.reset_token = 'reset-me'
+    alice.reset_token_expires = datetime.utcnow() + timedelta(hours=1)
+    db.session.commit()
+    return alice, community
+
+
+def full_scans(statements, table):
+    """Plan steps that read all of `table`, over every SELECT that names it."""
+    scans = []
+    for sql, params in statements:
+        if not sql.lstrip().upper().startswith('SELECT') or table not in sql:
+            continue
+        for row in db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', params):
+            detail = row[-1]
+            if detail == f'SCAN {table}':
+                scans.append(f'{detail}  <-  {sql}')
+    return scans
+
+
+CASES = [
+    ('moods', lambda c, user, community, headers: c.get(f'/mood/{user.id}')),
+    ('journal_entries', lambda c, user, community, headers: c.get('/journals/')),
+    ('journal_entries', lambda c, user, community, headers: c.get(f'/journals/?user_id={user.id}')),
+    ('community_messages', lambda c, user, community, headers: c.get(f'/community/{community.id}/messages')),
+    ('direct_messages', lambda c, user, community, headers: c.get(f'/community/messages/inbox/{user.id}')),
+    ('connections', lambda c, user, community, headers: c.get(f'/community/connections/{user.id}')),
+    ('users', lambda c, user, community, headers: c.post('/auth/reset-password', json={
+        'token': 'reset-me', 'password': 'new-password', 'confirm_password': 'new-password'})),
+    ('community_memberships', lambda c, user, community, headers: c.post(
+        f'/community/{community.id}/message', json={'content': 'hello'}, headers=headers)),
+]
+
+
+@pytest.mark.parametrize('table,request_', CASES, ids=[
+    'moods', 'journals', 'journals_by_user', 'community_messages', 'inbox',
+    'connections', 'reset_token', 'membership_check',
+])
+def test_hot_path_uses_an_index(client, seeded, auth_headers, statements, table, request_):
+    user, community = seeded
+    headers = auth_headers(user)
+    statements.clear()
+
+    response = request_(client, user, community, headers)
+
+    assert response.status_code < 400, response.get_json()
+    assert any(table in sql for sql, _ in statements), f'no query touched {table}'
+    assert full_scans(statements, table) == []
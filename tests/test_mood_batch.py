@@ -0,0 +1,34 @@
+# tests/test_mood_batch.py
+"""POST /mood/batch stores client timestamps as naive UTC and rejects ones
+from the future."""
+from datetime import datetime, timedelta
+
+from app.mood.models import Mood
+
+
+def test_created_at_is_stored_as_naive_utc(client, make_user, auth_headers):
+    alice = make_user('alice')
+
+    response = client.post('/mood/batch', headers=auth_headers(alice), json=[
+        {'emotion_label': 'calm', 'created_at': '2024-03-01T12:00:00+02:00'},
+        {'emotion_label': 'tired', 'created_at': '2024-03-01T12:00:00'},
+    ])
+
+    assert response.status_code == 201
+    stored = [m.created_at for m in Mood.query.order_by(Mood.id)]
+    assert stored == [datetime(2024, 3, 1, 10, 0), datetime(2024, 3, 1, 12, 0)]
+
+
+def test_future_created_at_is_rejected(client, make_user, auth_headers):
+    alice = make_user('alice')
+    soon = (datetime.utcnow() + timedelta(minutes=1)).isoformat()
+    tomorrow = (datetime.utcnow() + timedelta(days=1)).isoformat() + '+00:00'
+
+    response = client.post('/mood/batch', headers=auth_headers(alice), json=[
+        {'emotion_label': 'calm', 'created_at': soon},
+        {'emotion_label': 'calm', 'created_at': tomorrow},
+    ])
+
+    assert response.status_code == 400
+    assert response.get_json()['errors'] == [{'index': 1, 'error': 'created_at must not be in the future'}]
+    assert Mood.query.count() == 0
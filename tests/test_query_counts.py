@@ -0,0 +1,82 @@
+# tests/test_query_counts.py
+"""Expanded community pages cost a fixed number of SQL statements,
+however many rows they return."""
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.community.models import Community, CommunityMessage, DirectMessage, Connection
+
+
+@pytest.fixture
+def alice(make_user):
+    alice = make_user('alice')
+    db.session.add(Community(name='home', owner_id=alice.id))
+    db.session.commit()
+    return alice
+
+
+def add_peers(make_user, alice, start, count):
+    """Give each new peer a community, a message in alice's community, a DM
+    to alice and an accepted connection with her."""
+    home = Community.query.filter_by(owner_id=alice.id).one()
+    for i in range(start, start + count):
+        peer = make_user(f'peer{i}')
+        db.session.add_all([
+            Community(name=f'community{i}', owner_id=peer.id),
+            CommunityMessage(community_id=home.id, user_id=peer.id, content='hi'),
+            DirectMessage(sender_id=peer.id, recipient_id=alice.id, content='hey'),
+            Connection(requester_id=peer.id, addressee_id=alice.id, status='accepted',
+                       accepted_at=datetime.utcnow()),
+        ])
+    db.session.commit()
+
+
+def page_url(name, alice):
+    home = Community.query.filter_by(owner_id=alice.id).one()
+    return {
+        'communities': '/community/?expand=owner',
+        'messages': f'/community/{home.id}/messages?expand=sender',
+        'inbox': f'/community/messages/inbox/{alice.id}?expand=sender,recipient',
+        'connections': f'/community/connections/{alice.id}?expand=requester,addressee',
+    }[name]
+
+
+def count_statements(client, statements, url):
+    client.get(url)  # warm the user cache so both measurements see the same state
+    statements.clear()
+    response = client.get(url)
+    assert response.status_code == 200, response.get_json()
+    return len(statements), response.get_json()
+
+
+@pytest.mark.parametrize('page', ['communities', 'messages', 'inbox', 'connections'])
+def test_expanded_page_costs_fixed_statements(client, make_user, alice, statements, page):
+    add_peers(make_user, alice, 0, 2)
+    url = page_url(page, alice)
+    small, rows = count_statements(client, statements, url)
+
+    add_peers(make_user, alice, 2, 10)
+    large, more_rows = count_statements(client, statements, url)
+
+    assert len(more_rows) > len(rows)
+    assert large == small
+    assert small <= 3
+
+
+@pytest.mark.parametrize('page,field', [
+    ('communities', 'owner'), ('messages', 'sender'), ('inbox', 'sender'), ('connections', 'requester'),
+])
+def test_expanded_users_are_inlined(client, make_user, alice, page, field):
+    add_peers(make_user, alice, 0, 1)
+
+    rows = client.get(page_url(page, alice)).get_json()
+
+    assert rows and all(set(row[field]) == {'id', 'username', 'role', 'profile_image'} for row in rows)
+
+
+def test_unknown_expand_is_rejected(client, alice):
+    response = client.get('/community/?expand=password_hash')
+
+    assert response.status_code == 400